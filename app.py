@@ -1,4 +1,4 @@
-from flask import Flask, render_template,request, redirect, url_for, Response
+from flask import Flask, render_template,request, redirect, url_for, Response, stream_with_context
 from flask_socketio import SocketIO, emit
 import cv2
 import numpy as np
@@ -7,19 +7,172 @@ import ssl
 import os
 import time
 import json
+import itertools
+import threading
+from concurrent.futures import wait, FIRST_COMPLETED
 from model import BlindNavigationModel
+from engine import InferenceEngine
+from workers import connect_model_pool
+from pipeline import FramePipeline, CapturePolicy
+from metrics import MetricsRegistry
+from tracker import SessionTracker
+from cache import ResultCache
+from wire import ResultEncoder, WIRE_VERSION
+from bulk import iter_images, detach_upload, BulkImageError
 
 app = Flask(__name__)
 
 #개발용 시크릿 키
 app.config['SECRET_KEY'] = 'blind-road-helper-secret-key'
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
+# 앱 연결과 메시지 큐 접속은 init_socketio()에서 (워커 풀의 자식 프로세스가 이 모듈을 다시 import해도 연결하지 않음)
+socketio = SocketIO(cors_allowed_origins="*", async_mode='threading')
 
-# 시각장애인 도로 안내 모델 로드
-navigation_model = BlindNavigationModel()
+def init_socketio():
+    """Socket.IO 서버를 앱에 연결 - 여러 프런트엔드 프로세스로 띄울 때는 SOCKETIO_MESSAGE_QUEUE(예: redis://)로 이벤트 공유"""
+    socketio.init_app(app, message_queue=os.environ.get('SOCKETIO_MESSAGE_QUEUE'))
 
-# 흑백 모드 상태 변수
-grayscale_mode = False
+# 처리 단계별 시간과 카운터 (/metrics에서 Prometheus 형식으로 노출)
+metrics = MetricsRegistry()
+stage_seconds = metrics.histogram('brh_stage_seconds', '처리 단계별 소요 시간 (초)')
+frame_seconds = metrics.histogram('brh_frame_seconds', '프레임 하나의 전체 처리 시간 (초)')
+frames_total = metrics.counter('brh_frames_total', '처리한 프레임 수')
+invalid_frames_total = metrics.counter('brh_invalid_frames_total', '디코딩에 실패한 프레임 수')
+detections_total = metrics.counter('brh_detections_total', '클래스별 감지 수')
+model_skipped_total = metrics.counter('brh_model_skipped_total', '스케줄러/추적기가 건너뛴 모델 실행 수')
+
+# 프레임별 상세 디버그 출력 주기 (0이면 출력 안 함, N이면 N 프레임마다 한 번)
+DEBUG_DUMP_EVERY = int(os.environ.get('DEBUG_DUMP_EVERY', '0'))
+debug_frame_counter = itertools.count(1)
+
+# 모델 실행 위치
+# - MODEL_POOL 미설정: 이 프로세스에서 모델 로드 (백그라운드 병렬 로드 + 워밍업, 준비 상태는 /readyz)
+# - MODEL_POOL=local:N: 모델 워커 프로세스 N개를 직접 띄우고 공유 메모리로 프레임 전달
+# - MODEL_POOL=host:port: 다른 프런트엔드와 함께 쓰는 기존 워커 풀(workers.py)에 접속
+MODEL_POOL = os.environ.get('MODEL_POOL', '')
+MODEL_BACKGROUND_LOAD = os.environ.get('MODEL_BACKGROUND_LOAD', '1') == '1'
+
+# 엔진은 처음 쓸 때 생성 - 워커 풀은 spawn으로 프로세스를 띄우는데, 자식 프로세스가 이 모듈을
+# 다시 import하므로 import 시점에 프로세스를 시작하면 안 됨
+_inference_engine = None
+_inference_engine_lock = threading.Lock()
+
+def get_inference_engine():
+    """추론 엔진(이 프로세스의 InferenceEngine 또는 워커 풀 클라이언트)을 가져오거나 생성"""
+    global _inference_engine
+    if _inference_engine is None:
+        with _inference_engine_lock:
+            if _inference_engine is None:
+                if MODEL_POOL:
+                    engine = connect_model_pool(MODEL_POOL)
+                else:
+                    # 여러 클라이언트의 프레임을 묶어 배치 추론하는 엔진
+                    engine = InferenceEngine(BlindNavigationModel(background=MODEL_BACKGROUND_LOAD))
+                engine.add_stage_listener(lambda stage, seconds: stage_seconds.observe(seconds, stage=stage))
+                _inference_engine = engine
+    return _inference_engine
+
+# 세션별 옵션 (흑백 모드 등) - 한 클라이언트의 설정이 다른 클라이언트에 영향을 주지 않음
+session_options = {}
+
+# 세션별 박스 추적/안내 상태 안정화 (블록 모델은 BLOCK_INTERVAL 프레임마다 한 번 실행)
+BLOCK_INTERVAL = int(os.environ.get('BLOCK_INTERVAL', '3'))
+session_trackers = {}
+
+# 압축 결과 형식을 요청한 세션의 인코더 (없으면 기존 JSON 형식으로 전송)
+session_encoders = {}
+
+# 같은 사진을 다시 올리면 모델을 실행하지 않고 이전 결과 사용 (UPLOAD_CACHE_DIR이 있으면 재시작 후에도 유지,
+# 디스크 사용량은 UPLOAD_CACHE_DISK_MB까지)
+# 엔진과 같은 이유로 처음 쓸 때 생성 (자식 프로세스에서 캐시 디렉터리를 만들지 않음)
+_upload_cache = None
+_upload_cache_lock = threading.Lock()
+
+def get_upload_cache():
+    """업로드 결과 캐시를 가져오거나 생성"""
+    global _upload_cache
+    if _upload_cache is None:
+        with _upload_cache_lock:
+            if _upload_cache is None:
+                _upload_cache = ResultCache(max_entries=int(os.environ.get('UPLOAD_CACHE_SIZE', '256')),
+                                            ttl=float(os.environ.get('UPLOAD_CACHE_TTL', '3600')),
+                                            disk_dir=os.environ.get('UPLOAD_CACHE_DIR') or None,
+                                            max_disk_bytes=int(os.environ.get('UPLOAD_CACHE_DISK_MB', '256')) * 1024 * 1024)
+    return _upload_cache
+
+upload_cache_total = metrics.counter('brh_upload_cache_total', '업로드 결과 캐시 조회 수 (hit/miss)')
+metrics.gauge('brh_upload_cache_entries', '메모리 결과 캐시 항목 수', lambda: len(get_upload_cache()))
+
+# 업로드 이미지의 긴 변이 이 값의 2배 이상이면 디코딩하면서 1/2~1/8로 축소 (IMREAD_REDUCED_*)
+UPLOAD_MAX_SIDE = int(os.environ.get('UPLOAD_MAX_SIDE', '1920'))
+REDUCED_READ_FLAGS = {
+    (2, False): cv2.IMREAD_REDUCED_COLOR_2, (4, False): cv2.IMREAD_REDUCED_COLOR_4, (8, False): cv2.IMREAD_REDUCED_COLOR_8,
+    (2, True): cv2.IMREAD_REDUCED_GRAYSCALE_2, (4, True): cv2.IMREAD_REDUCED_GRAYSCALE_4, (8, True): cv2.IMREAD_REDUCED_GRAYSCALE_8
+}
+
+def decode_frame(data, grayscale=False, reduce=1):
+    """소켓/업로드로 받은 프레임(바이너리 JPEG 또는 base64 data URL)을 이미지로 디코딩
+    
+    grayscale이면 처음부터 1채널로 디코딩 (채널 확장은 모델 입력 전처리에서 처리)
+    reduce가 2/4/8이면 디코딩하면서 해당 비율로 축소 (JPEG은 축소된 크기로 바로 복원)
+    """
+    if isinstance(data, str):
+        # 이전 클라이언트 호환용 base64 data URL 경로
+        data = base64.b64decode(data.split(',', 1)[-1])
+    
+    # 바이너리 첨부는 복사 없이 memoryview 그대로 디코딩
+    buffer = np.frombuffer(memoryview(data), np.uint8)
+    if buffer.size == 0:
+        return None
+    flags = REDUCED_READ_FLAGS.get((reduce, grayscale),
+                                   cv2.IMREAD_GRAYSCALE if grayscale else cv2.IMREAD_COLOR)
+    return cv2.imdecode(buffer, flags)
+
+def image_size(data):
+    """JPEG/PNG 헤더만 읽어 (너비, 높이) 반환 (알 수 없으면 None)"""
+    data = memoryview(data)
+    if data[:8] == b'\x89PNG\r\n\x1a\n':
+        return int.from_bytes(data[16:20], 'big'), int.from_bytes(data[20:24], 'big')
+    if data[:2] != b'\xff\xd8':
+        return None
+    
+    # JPEG: SOF 마커까지 세그먼트 건너뛰기
+    index = 2
+    while index + 9 < len(data):
+        if data[index] != 0xFF:
+            return None
+        marker = data[index + 1]
+        if marker == 0xFF:
+            index += 1
+            continue
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            height = int.from_bytes(data[index + 5:index + 7], 'big')
+            width = int.from_bytes(data[index + 7:index + 9], 'big')
+            return width, height
+        index += 2 + int.from_bytes(data[index + 2:index + 4], 'big')
+    return None
+
+def upload_reduction(data):
+    """긴 변이 UPLOAD_MAX_SIDE 아래로 내려가지 않는 가장 큰 축소 비율 (1, 2, 4, 8)"""
+    size = image_size(data)
+    if size is None or not UPLOAD_MAX_SIDE:
+        return 1
+    reduce = 1
+    while reduce < 8 and max(size) / (reduce * 2) >= UPLOAD_MAX_SIDE:
+        reduce *= 2
+    return reduce
+
+def scale_output(output, factor):
+    """축소 디코딩한 이미지의 감지 결과 좌표를 원본 해상도로 되돌림"""
+    all_box_coords, detected_classes, detected_boxes, navigation_info, arrow_info = output
+    if factor == 1:
+        return output
+    all_box_coords = [[value * factor for value in box] for box in all_box_coords]
+    detected_boxes = [dict(box, box=[value * factor for value in box['box']]) for box in detected_boxes]
+    arrow_info = dict(arrow_info, arrows=[
+        dict(arrow, start=[value * factor for value in arrow['start']], end=[value * factor for value in arrow['end']])
+        for arrow in arrow_info['arrows']
+    ])
+    return all_box_coords, detected_classes, detected_boxes, navigation_info, arrow_info
 
 @app.route('/')
 def index():
@@ -28,11 +181,29 @@ def index():
 # 흑백 모드 토글 이벤트 핸들러
 @socketio.on('toggle_grayscale')
 def handle_toggle_grayscale(data):
-    global grayscale_mode
-    grayscale_mode = data
-    print("Test")
-    print(f"흑백 모드 변경됨: {grayscale_mode}")
-    return {'status': 'success', 'grayscale_mode': grayscale_mode}
+    options = session_options.get(request.sid)
+    if options is None:
+        return {'status': 'error', 'message': 'unknown session'}
+    options['grayscale'] = bool(data)
+    print(f"흑백 모드 변경됨: {options['grayscale']} (세션 {request.sid})")
+    return {'status': 'success', 'grayscale_mode': options['grayscale']}
+
+# 결과 전송 형식 협상 - 클라이언트가 지원 버전을 알려 오면 압축(+변경분) 형식으로 전송
+@socketio.on('result_format')
+def handle_result_format(data):
+    data = data or {}
+    if data.get('version') != WIRE_VERSION:
+        session_encoders.pop(request.sid, None)
+        return {'version': None}
+    session_encoders[request.sid] = ResultEncoder(delta=bool(data.get('delta', True)))
+    return {'version': WIRE_VERSION}
+
+# 클라이언트가 적용한 결과 프레임 확인 (다음 결과는 이 프레임 기준 변경분만 전송)
+@socketio.on('result_ack')
+def handle_result_ack(seq):
+    encoder = session_encoders.get(request.sid)
+    if encoder is not None and isinstance(seq, int):
+        encoder.ack(seq)
 
 @socketio.on('start-camera')
 def handle_start_camera():
@@ -40,48 +211,61 @@ def handle_start_camera():
 
 @socketio.on('connect')
 def handle_connect():
-    global grayscale_mode
+    # 세션 상태는 여기서만 생성 (연결이 끊긴 뒤 처리 중이던 프레임이 다시 만들지 않도록)
+    # 흑백 모드는 세션별 설정 - 새 세션은 컬러로 시작하고, 클라이언트가 연결 직후 자신의 설정을 다시 보냄
+    session_options[request.sid] = {'grayscale': False}
+    session_trackers[request.sid] = SessionTracker(get_inference_engine().model_names, BLOCK_INTERVAL)
     print('Client connected')
-    # 클라이언트 연결 시 현재 흑백 모드 상태를 전송
-    emit('grayscale_mode_sync', {'grayscale_mode': grayscale_mode})
 
 @socketio.on('disconnect')
 def handle_disconnect():
+    get_frame_pipeline().remove(request.sid)
+    session_trackers.pop(request.sid, None)
+    session_options.pop(request.sid, None)
+    session_encoders.pop(request.sid, None)
     print('Client disconnected')
 
-@socketio.on('image')
-def handle_image(data):
-    global grayscale_mode
+def process_frame(sid, data):
+    """세션 프레임 하나를 디코딩하고 감지해 응답 데이터 생성 (파이프라인 워커에서 실행)"""
     start_time = time.time()
+    options = session_options.get(sid)
+    tracker = session_trackers.get(sid)
+    if options is None or tracker is None:
+        # 처리 대기 중에 연결이 끊긴 세션 - 프레임 버림
+        return None
+    grayscale = options['grayscale']
     
-    # base64 이미지 데이터 받기
-    image_data = data.split(',')[1]
-    image_bytes = base64.b64decode(image_data)
-    
-    # 이미지로 변환
-    nparr = np.frombuffer(image_bytes, np.uint8)
-    img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+    # 바이너리 JPEG (또는 base64 data URL) 이미지로 변환 (흑백 모드면 바로 1채널로 디코딩)
+    with stage_seconds.time(stage='decode'):
+        img = decode_frame(data, grayscale)
     
     if img is None or img.size == 0:
+        invalid_frames_total.inc()
         print("Error: Invalid image data received")
-        return
+        return None
     
-    # 흑백 모드가 활성화된 경우 이미지를 그레이스케일로 변환
-    if grayscale_mode:
-        print("흑백 모드로 이미지 처리 중...")
-        img_gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        img = cv2.cvtColor(img_gray, cv2.COLOR_GRAY2BGR)
+    # 다중 모델로 객체 감지 (블록 모델을 건너뛰는 프레임은 추적 박스를 대신 사용)
+    models, carried = tracker.plan(img)
+    if models is not None:
+        for model_name in get_inference_engine().model_names:
+            if model_name not in models:
+                model_skipped_total.inc(model=model_name)
+    output = get_inference_engine().detect(img, models, carried)
+    all_box_coords, detected_classes, detected_boxes, navigation_info, arrow_info = tracker.update(
+        img.shape, output, models)
     
-    # 다중 모델로 객체 감지
-    all_box_coords, detected_classes, detected_boxes, navigation_info, arrow_info = navigation_model.detect(img)
+    for class_name in detected_classes:
+        detections_total.inc(**{'class': class_name})
     
-    # 디버깅 정보 출력
-    print("\n=== 감지 결과 ===")
-    print(f"감지된 클래스: {detected_classes}")
-    print(f"감지된 박스 수: {len(detected_boxes)}")
-    print(f"네비게이션 정보: {navigation_info}")
-    print(f"모든 바운딩 박스 좌표: {all_box_coords}")
-    print(f"화살표 정보: {arrow_info}")
+    # 디버깅 정보 출력 (DEBUG_DUMP_EVERY 프레임마다 한 번만)
+    frame_number = next(debug_frame_counter)
+    if DEBUG_DUMP_EVERY and frame_number % DEBUG_DUMP_EVERY == 0:
+        print(f"\n=== 감지 결과 (프레임 {frame_number}) ===")
+        print(f"감지된 클래스: {detected_classes}")
+        print(f"감지된 박스 수: {len(detected_boxes)}")
+        print(f"네비게이션 정보: {navigation_info}")
+        print(f"모든 바운딩 박스 좌표: {all_box_coords}")
+        print(f"화살표 정보: {arrow_info}")
     
     # 결과 이미지를 생성하지 않으므로 관련 코드 주석 처리 또는 삭제
     # # 흑백 모드인 경우, 결과 이미지도 그레이스케일로 변환
@@ -96,7 +280,8 @@ def handle_image(data):
     
     # 처리 시간 측정
     process_time = time.time() - start_time
-    print(f"Frame processed in {process_time:.3f} seconds.")
+    frame_seconds.observe(process_time)
+    frames_total.inc()
     
     # 응답 데이터 준비
     response_data = {
@@ -106,10 +291,69 @@ def handle_image(data):
         'box_coords': all_box_coords, # 바운딩 박스 좌표 추가
         'navigation': navigation_info,
         'arrows': arrow_info, # 화살표 정보 추가
-        'grayscale_mode': grayscale_mode
+        'grayscale_mode': grayscale,
+        'capture': capture_policy.update(process_time, get_frame_pipeline().queue_depth()) # 권장 캡처 설정
     }
     
-    emit('result', response_data)
+    encoder = session_encoders.get(sid)
+    if encoder is not None:
+        with stage_seconds.time(stage='encode'):
+            return encoder.encode(response_data)
+    return response_data
+
+
+def emit_to_session(event, data, sid):
+    """파이프라인 워커 스레드에서 특정 세션으로 이벤트 전송"""
+    with stage_seconds.time(stage='emit'):
+        socketio.emit(event, data, to=sid)
+
+# 세션별 최신 프레임만 처리하는 파이프라인 (추론 동시 실행 수 제한)
+# 워커 스레드를 띄우므로 엔진처럼 처음 쓸 때 생성
+FRAME_WORKERS = 4
+_frame_pipeline = None
+_frame_pipeline_lock = threading.Lock()
+
+def get_frame_pipeline():
+    """프레임 처리 파이프라인을 가져오거나 생성"""
+    global _frame_pipeline
+    if _frame_pipeline is None:
+        with _frame_pipeline_lock:
+            if _frame_pipeline is None:
+                _frame_pipeline = FramePipeline(process_frame, emit_to_session, max_workers=FRAME_WORKERS)
+    return _frame_pipeline
+
+# 서버 부하에 따라 클라이언트 캡처 간격과 해상도를 조절
+capture_policy = CapturePolicy(FRAME_WORKERS)
+
+metrics.gauge('brh_pipeline_queue_depth', '처리를 기다리는 세션 수', lambda: get_frame_pipeline().queue_depth())
+metrics.gauge('brh_frames_dropped', '새 프레임에 밀려 버려진 프레임 수', lambda: get_frame_pipeline().dropped)
+metrics.gauge('brh_engine_pending', '배치 추론을 기다리는 프레임 수', lambda: get_inference_engine().pending())
+metrics.gauge('brh_model_ready', '모델 로드/워밍업 완료 여부', lambda: int(get_inference_engine().is_ready()))
+
+@app.route('/metrics')
+def metrics_endpoint():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/healthz')
+def healthz():
+    # 프로세스가 살아 있으면 항상 200
+    return {'status': 'ok'}
+
+@app.route('/readyz')
+def readyz():
+    # 모델 로드와 워밍업이 끝나야 200 (그 전에는 503)
+    ready = get_inference_engine().is_ready()
+    return {'ready': ready, 'models': get_inference_engine().status()}, 200 if ready else 503
+
+@socketio.on('image')
+def handle_image(data):
+    # 모델 준비 전에는 프레임을 버리고 상태만 알림 (클라이언트는 다음 프레임을 계속 보냄)
+    if not get_inference_engine().is_ready():
+        emit('server_status', {'ready': False, 'models': get_inference_engine().status()})
+        return
+    
+    # 소켓 핸들러는 프레임만 등록하고 바로 반환
+    get_frame_pipeline().submit(request.sid, data)
 
 
 @app.route('/upload', methods=['GET', 'POST'])
@@ -122,21 +366,29 @@ def upload_image():
         if file.filename == '':
             return 'No selected file'
         
-        # 파일 -> 이미지 배열로 변환
-        file_bytes = np.frombuffer(file.read(), np.uint8)
-        img = cv2.imdecode(file_bytes, cv2.IMREAD_COLOR)
+        if not get_inference_engine().is_ready():
+            return 'Model is loading, try again shortly', 503
+        
+        # 파일 -> 이미지 배열로 변환 (흑백 모드는 폼에서 선택)
+        # 큰 사진은 디코딩 단계에서 축소하고, 결과 좌표는 원본 해상도로 되돌림
+        data = file.read()
+        grayscale = request.form.get('grayscale') == 'on'
+        reduce = upload_reduction(data)
+        img = decode_frame(data, grayscale=grayscale, reduce=reduce)
 
         if img is None:
             return 'Invalid image'
 
-        # 흑백 모드 적용
-        if grayscale_mode:
-            print("흑백 모드로 이미지 처리 중...")
-            img_gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-            img = cv2.cvtColor(img_gray, cv2.COLOR_GRAY2BGR)
-
-        # 모델 처리
-        all_box_coords, detected_classes, detected_boxes, navigation_info, arrow_info = navigation_model.detect(img)
+        # 모델 처리 (같은 이미지/흑백 설정/모델 버전이면 캐시된 결과 사용)
+        cache_key = ResultCache.make_key(img, grayscale, get_inference_engine().model_version())
+        output = get_upload_cache().get(cache_key)
+        if output is None:
+            upload_cache_total.inc(result='miss')
+            output = get_inference_engine().detect(img)
+            get_upload_cache().put(cache_key, list(output))
+        else:
+            upload_cache_total.inc(result='hit')
+        all_box_coords, detected_classes, detected_boxes, navigation_info, arrow_info = scale_output(output, reduce)
 
         # if grayscale_mode:
         #     result_gray = cv2.cvtColor(result_img, cv2.COLOR_BGR2GRAY)
@@ -157,6 +409,93 @@ def upload_image():
 
     return render_template('upload.html')
 
+# /api/detect에서 동시에 추론 대기열에 넣어 둘 최대 이미지 수 (배치 크기이자 메모리 상한)
+API_DETECT_WINDOW = int(os.environ.get('API_DETECT_WINDOW', '8'))
+api_images_total = metrics.counter('brh_api_images_total', '/api/detect로 처리한 이미지 수 (ok/error)')
+
+@app.route('/api/detect', methods=['POST'])
+def api_detect():
+    """여러 이미지(multipart 파일 여러 개 또는 zip/tar)를 감지해 이미지별 결과를 NDJSON으로 스트리밍"""
+    if not get_inference_engine().is_ready():
+        return {'error': 'model is loading', 'models': get_inference_engine().status()}, 503
+    
+    grayscale = request.values.get('grayscale', '').lower() in ('1', 'true', 'on')
+    if request.files:
+        parts = [(file.filename, detach_upload(file.stream), file.mimetype) for _, file in request.files.items(multi=True)]
+    else:
+        # 본문 자체가 이미지 하나 또는 zip/tar인 요청
+        parts = [('', request.stream, request.mimetype)]
+    
+    return Response(stream_with_context(stream_detections(iter_images(parts), grayscale)),
+                    mimetype='application/x-ndjson')
+
+def stream_detections(images, grayscale):
+    """이미지를 하나씩 디코딩해 추론 대기열에 넣고 끝나는 순서대로 결과를 한 줄씩 반환
+    
+    대기 중인 이미지는 최대 API_DETECT_WINDOW개 - 엔진은 그동안 쌓인 이미지를 한 배치로 추론
+    """
+    pending = {}  # Future -> (순번, 이름, 축소 비율, 캐시 키)
+    model_version = get_inference_engine().model_version()
+    
+    def drain(timeout=None):
+        """끝난 결과 반환 (timeout=None이면 하나가 끝날 때까지 기다리고, 0이면 기다리지 않음)"""
+        done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+        for future in done:
+            index, name, reduce, cache_key = pending.pop(future)
+            try:
+                output = future.result()
+            except Exception as e:
+                yield detection_line(index, name, error=f'detection failed: {e}')
+                continue
+            get_upload_cache().put(cache_key, list(output))
+            yield detection_line(index, name, scale_output(output, reduce))
+    
+    index = -1
+    try:
+        for index, (name, data) in enumerate(images):
+            if isinstance(data, BulkImageError):
+                yield detection_line(index, name, error=str(data))
+                continue
+            
+            reduce = upload_reduction(data)
+            img = decode_frame(data, grayscale=grayscale, reduce=reduce)
+            del data
+            if img is None:
+                yield detection_line(index, name, error='invalid image')
+                continue
+            
+            cache_key = ResultCache.make_key(img, grayscale, model_version)
+            output = get_upload_cache().get(cache_key)
+            if output is not None:
+                upload_cache_total.inc(result='hit')
+                yield detection_line(index, name, scale_output(output, reduce))
+                continue
+            upload_cache_total.inc(result='miss')
+            
+            while len(pending) >= API_DETECT_WINDOW:
+                yield from drain()
+            pending[get_inference_engine().submit(img)] = (index, name, reduce, cache_key)
+            # 창이 차지 않아도 이미 끝난 결과는 바로 보냄
+            yield from drain(timeout=0)
+    except Exception as e:
+        # 압축 파일이 깨진 경우 등 - 그때까지 읽은 이미지 결과는 그대로 보냄
+        yield detection_line(index + 1, None, error=f'invalid request body: {e}')
+    
+    while pending:
+        yield from drain()
+
+def detection_line(index, name, output=None, error=None):
+    """/api/detect 결과 한 줄 (NDJSON)"""
+    line = {'index': index, 'name': name}
+    if error is not None:
+        api_images_total.inc(result='error')
+        line['error'] = error
+    else:
+        api_images_total.inc(result='ok')
+        _, detected_classes, detected_boxes, navigation_info, arrow_info = output
+        line.update(classes=detected_classes, boxes=detected_boxes, navigation=navigation_info, arrows=arrow_info)
+    return json.dumps(line, ensure_ascii=False) + '\n'
+
 if __name__ == '__main__':
     # SSL 인증서 경로
     cert_path = 'cert/cert.pem'
@@ -167,6 +506,10 @@ if __name__ == '__main__':
         from generate_cert import generate_certificate
         generate_certificate()
     
+    # 요청을 받기 전에 모델 로드(또는 워커 풀 시작)를 미리 시작
+    get_inference_engine()
+    init_socketio()
+    
     # HTTPS로 서버 실행
     print("시각장애인 도로 안내 camera일 서버를 시작합니다...")
     print("이 서버에 모바일 기기로 접속하려면 다음 URL을 사용하세요:")
@@ -0,0 +1,131 @@
+import argparse
+import hashlib
+import os
+import sys
+
+import numpy as np
+import torch
+from ultralytics import YOLO
+
+
+# 지원하는 추론 백엔드 (torch는 기존 .pt 그대로)
+BACKENDS = ('torch', 'onnx', 'openvino')
+
+DEFAULT_MODEL_PATHS = {
+    'block': './block.pt',
+    'scooter': './scooter.pt',
+    'button': './button.pt'
+}
+
+
+def weights_version(paths, *settings):
+    """가중치 파일(크기, 수정 시각)과 설정값으로 만든 모델 버전 문자열 - 파일이 바뀌면 달라짐"""
+    digest = hashlib.sha1()
+    for path in paths:
+        if os.path.exists(path):
+            stat = os.stat(path)
+            digest.update(f'{path}:{stat.st_size}:{stat.st_mtime_ns};'.encode())
+        else:
+            digest.update(f'{path}:missing;'.encode())
+    for setting in settings:
+        digest.update(repr(setting).encode())
+    return digest.hexdigest()[:16]
+
+
+def exported_path(model_path, backend, int8=False):
+    """백엔드별 변환 결과 경로 (ultralytics export 기본 이름 규칙)"""
+    stem = os.path.splitext(model_path)[0]
+    if backend == 'onnx':
+        return f'{stem}.int8.onnx' if int8 else f'{stem}.onnx'
+    if backend == 'openvino':
+        return f'{stem}_int8_openvino_model' if int8 else f'{stem}_openvino_model'
+    return model_path
+
+
+def export_model(model_path, backend, int8=False, imgsz=640):
+    """.pt 모델을 ONNX/OpenVINO로 한 번만 변환해 디스크에 저장하고 경로 반환 (이미 있으면 그대로 사용)"""
+    target = exported_path(model_path, backend, int8)
+    if backend == 'torch' or os.path.exists(target):
+        return target
+
+    print(f"{model_path} -> {backend}{' (INT8)' if int8 else ''} 변환 중...")
+    if backend == 'onnx':
+        onnx_path = exported_path(model_path, 'onnx')
+        if not os.path.exists(onnx_path):
+            onnx_path = YOLO(model_path).export(format='onnx', imgsz=imgsz)
+        if int8:
+            # 가중치만 INT8로 바꾸는 동적 양자화 (보정 데이터 불필요)
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+            quantize_dynamic(onnx_path, target, weight_type=QuantType.QUInt8)
+    else:
+        exported = YOLO(model_path).export(format='openvino', imgsz=imgsz, int8=int8)
+        if os.path.normpath(exported) != os.path.normpath(target):
+            os.replace(exported, target)
+
+    print(f"✓ 변환 완료: {target}")
+    return target
+
+
+def load_model(model_path, backend='torch', int8=False, threads=None):
+    """지정한 백엔드로 YOLO 모델 로드 - 결과는 백엔드와 관계없이 같은 ultralytics Results 형식"""
+    if backend not in BACKENDS:
+        raise ValueError(f"지원하지 않는 백엔드: {backend} (가능: {', '.join(BACKENDS)})")
+
+    if backend == 'torch':
+        if threads:
+            torch.set_num_threads(threads)
+        return YOLO(model_path)
+
+    path = export_model(model_path, backend, int8)
+    model = YOLO(path, task='detect')
+    if threads:
+        _set_runtime_threads(model, path, backend, threads)
+    return model
+
+
+def _set_runtime_threads(model, path, backend, threads):
+    """ONNX Runtime 세션/OpenVINO 컴파일 모델을 지정한 스레드 수로 다시 생성"""
+    # ultralytics는 첫 호출 때 런타임을 만들므로 빈 이미지로 한 번 실행
+    model(np.zeros((64, 64, 3), dtype=np.uint8), verbose=False)
+    runtime = model.predictor.model
+
+    try:
+        if backend == 'onnx':
+            import onnxruntime
+
+            options = onnxruntime.SessionOptions()
+            options.intra_op_num_threads = threads
+            options.inter_op_num_threads = 1
+            runtime.session = onnxruntime.InferenceSession(
+                path, sess_options=options, providers=runtime.session.get_providers())
+        elif backend == 'openvino':
+            import openvino
+
+            core = openvino.Core()
+            xml_path = next(os.path.join(path, name) for name in os.listdir(path) if name.endswith('.xml'))
+            runtime.ov_compiled_model = core.compile_model(
+                core.read_model(xml_path), 'CPU',
+                config={'INFERENCE_NUM_THREADS': threads, 'PERFORMANCE_HINT': 'LATENCY'})
+    except Exception as e:
+        print(f"⚠️ {backend} 스레드 수 설정 실패 (기본값 사용): {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='block/scooter/button 모델을 CPU 추론용 형식으로 미리 변환')
+    parser.add_argument('--backend', choices=BACKENDS[1:], default='onnx', help='변환할 백엔드')
+    parser.add_argument('--int8', action='store_true', help='INT8 양자화 모델로 변환')
+    parser.add_argument('--imgsz', type=int, default=640, help='변환 입력 크기')
+    args = parser.parse_args()
+
+    status = 0
+    for model_name, model_path in DEFAULT_MODEL_PATHS.items():
+        if not os.path.exists(model_path):
+            print(f"⚠️ {model_name} 모델 파일을 찾을 수 없습니다: {model_path}")
+            status = 1
+            continue
+        export_model(model_path, args.backend, int8=args.int8, imgsz=args.imgsz)
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
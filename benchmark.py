@@ -0,0 +1,279 @@
+import argparse
+import glob
+import json
+import os
+import resource
+import sys
+import time
+import zlib
+
+import cv2
+import numpy as np
+
+from backends import BACKENDS
+from model import BlindNavigationModel
+
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+
+
+class StandInBoxes:
+    """ultralytics Boxes와 같은 필드(xyxy, conf, cls)를 가진 NumPy 박스 모음"""
+
+    def __init__(self, xyxy, conf, cls):
+        self.xyxy = xyxy
+        self.conf = conf
+        self.cls = cls
+
+    def __len__(self):
+        return len(self.conf)
+
+
+class StandInResult:
+    """ultralytics Results 대용 (boxes와 speed만 제공)"""
+
+    def __init__(self, boxes, speed):
+        self.boxes = boxes
+        self.speed = speed
+
+    def __len__(self):
+        return len(self.boxes)
+
+
+class StandInModel:
+    def __init__(self, model_name, num_classes, max_boxes, imgsz=640):
+        """가중치(.pt)가 없을 때 쓰는 CPU 대용 모델 - 이미지 내용으로 정해지는 가짜 박스 생성"""
+        self.model_name = model_name
+        self.num_classes = num_classes
+        self.max_boxes = max_boxes
+        self.imgsz = imgsz
+
+    def __call__(self, images, verbose=False, conf=0.25, **kwargs):
+        if getattr(images, 'ndim', 0) == 4:
+            # 공유 전처리 텐서 (BCHW, RGB, 0~1)는 ultralytics처럼 그대로 입력 크기 이미지로 사용
+            pixels = (np.asarray(images).transpose(0, 2, 3, 1)[..., ::-1] * 255).round().astype(np.uint8)
+            images = list(pixels)
+        elif not isinstance(images, (list, tuple)):
+            images = [images]
+        return [self._predict(image, conf) for image in images]
+
+    def _predict(self, image, conf):
+        start = time.perf_counter()
+        h, w = image.shape[:2]
+
+        # 전처리 흉내: YOLO 입력 크기로 축소
+        scale = self.imgsz / max(h, w)
+        small = cv2.resize(image, (max(1, int(w * scale)), max(1, int(h * scale))))
+        preprocess_time = time.perf_counter() - start
+
+        # 같은 이미지는 항상 같은 박스가 나오도록 축소 이미지로 시드 결정
+        seed = (zlib.crc32(self.model_name.encode()) ^ int(small[::16, ::16].sum())) % (2 ** 32)
+        rng = np.random.default_rng(seed)
+        count = int(rng.integers(0, self.max_boxes + 1))
+
+        x1 = rng.uniform(0, w * 0.9, count)
+        y1 = rng.uniform(0, h * 0.9, count)
+        x2 = np.minimum(x1 + rng.uniform(w * 0.02, w * 0.25, count), w)
+        y2 = np.minimum(y1 + rng.uniform(h * 0.02, h * 0.25, count), h)
+        xyxy = np.stack([x1, y1, x2, y2], axis=1).astype(np.float32)
+        scores = rng.uniform(0.3, 1.0, count).astype(np.float32)
+        classes = rng.integers(0, self.num_classes, count).astype(np.float32)
+
+        # 실제 YOLO처럼 conf 이상만 반환
+        keep = scores >= conf
+        boxes = StandInBoxes(xyxy[keep], scores[keep], classes[keep])
+        inference_time = time.perf_counter() - start - preprocess_time
+
+        speed = {'preprocess': preprocess_time * 1000, 'inference': inference_time * 1000, 'postprocess': 0.0}
+        return StandInResult(boxes, speed)
+
+
+# 대용 모델 설정 (클래스 수, 프레임당 최대 박스 수)
+STAND_IN_SPECS = {
+    'block': (2, 40),
+    'scooter': (1, 3),
+    'button': (1, 2)
+}
+
+
+def install_stand_in_models(model, force=False):
+    """로드되지 않은 모델(또는 force=True면 전부)을 대용 모델로 교체하고 교체한 이름 목록 반환"""
+    replaced = []
+    for model_name, (num_classes, max_boxes) in STAND_IN_SPECS.items():
+        if force or model.models.get(model_name) is None:
+            model.models[model_name] = StandInModel(model_name, num_classes, max_boxes)
+            replaced.append(model_name)
+    return replaced
+
+
+def parse_resolutions(text):
+    """'640x480,1920x1080' 형식의 해상도 목록 파싱"""
+    if not text:
+        return []
+    resolutions = []
+    for item in text.split(','):
+        width, height = item.lower().split('x')
+        resolutions.append((int(width), int(height)))
+    return resolutions
+
+
+def load_images(paths, resolutions):
+    """이미지 파일을 읽고, 지정한 해상도가 있으면 해당 크기로 변환한 프레임 목록 생성"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(
+                os.path.join(path, name) for name in os.listdir(path)
+                if name.lower().endswith(IMAGE_EXTENSIONS)
+            ))
+        else:
+            files.extend(sorted(glob.glob(path)))
+
+    frames = []
+    for file_path in files:
+        image = cv2.imread(file_path, cv2.IMREAD_COLOR)
+        if image is None:
+            print(f"⚠️ 이미지를 읽을 수 없습니다: {file_path}")
+            continue
+        if resolutions:
+            for width, height in resolutions:
+                frames.append((f'{os.path.basename(file_path)}@{width}x{height}',
+                               cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)))
+        else:
+            frames.append((os.path.basename(file_path), image))
+    return frames
+
+
+def peak_rss_mb():
+    """프로세스 최대 메모리 사용량 (MB)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS는 바이트, Linux는 KB 단위
+    if sys.platform == 'darwin':
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+def run_benchmark(model, frames, repeat=1, batch_size=1, warmup=1):
+    """프레임 목록을 반복 감지하며 지연시간/처리량/단계별 시간 측정"""
+    # 워밍업 (측정 제외)
+    for _, image in frames[:warmup]:
+        model.detect(image)
+
+    latencies = []
+    with model.profile() as stage_profile:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for index in range(0, len(frames), batch_size):
+                batch = [image for _, image in frames[index:index + batch_size]]
+                batch_start = time.perf_counter()
+                model.detect_batch(batch)
+                # 배치 안의 프레임은 모두 배치가 끝나야 결과를 받음
+                latencies.extend([time.perf_counter() - batch_start] * len(batch))
+        elapsed = time.perf_counter() - start
+
+    latencies_ms = np.array(latencies) * 1000
+    stages = {
+        stage: {
+            'count': values['count'],
+            'mean_ms': values['mean'] * 1000,
+            'total_ms': values['total'] * 1000
+        }
+        for stage, values in sorted(stage_profile.summary().items())
+    }
+
+    return {
+        'frames': len(latencies),
+        'latency_ms': {
+            'mean': float(latencies_ms.mean()),
+            'p50': float(np.percentile(latencies_ms, 50)),
+            'p95': float(np.percentile(latencies_ms, 95)),
+            'p99': float(np.percentile(latencies_ms, 99)),
+            'max': float(latencies_ms.max())
+        },
+        'throughput_fps': len(latencies) / elapsed if elapsed > 0 else 0.0,
+        'peak_rss_mb': peak_rss_mb(),
+        'stages': stages
+    }
+
+
+def compare_with_baseline(report, baseline, tolerance):
+    """기준 결과 대비 tolerance(비율) 이상 느려진 항목 목록 반환"""
+    regressions = []
+    for key in ('p50', 'p95', 'p99'):
+        current = report['latency_ms'][key]
+        previous = baseline['latency_ms'][key]
+        if previous > 0 and current > previous * (1 + tolerance):
+            regressions.append(f"latency {key}: {previous:.2f}ms -> {current:.2f}ms")
+
+    current = report['throughput_fps']
+    previous = baseline['throughput_fps']
+    if previous > 0 and current < previous * (1 - tolerance):
+        regressions.append(f"throughput: {previous:.2f}fps -> {current:.2f}fps")
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='BlindNavigationModel.detect 오프라인 벤치마크')
+    parser.add_argument('paths', nargs='*', default=['img'], help='이미지 디렉터리 또는 glob (기본: img)')
+    parser.add_argument('--repeat', type=int, default=1, help='전체 이미지 반복 횟수')
+    parser.add_argument('--batch-size', type=int, default=1, help='detect_batch 한 번에 넣을 프레임 수')
+    parser.add_argument('--warmup', type=int, default=1, help='측정에서 제외할 워밍업 프레임 수')
+    parser.add_argument('--resolutions', default='', help='합성 해상도 목록 (예: 640x480,1920x1080)')
+    parser.add_argument('--stand-in', action='store_true', help='가중치가 있어도 대용 모델 사용')
+    parser.add_argument('--backend', choices=BACKENDS, help='추론 백엔드 (기본: MODEL_BACKEND 또는 torch)')
+    parser.add_argument('--int8', action='store_true', help='INT8 양자화 모델 사용 (onnx/openvino)')
+    parser.add_argument('--threads', type=int, help='CPU 추론 스레드 수')
+    parser.add_argument('--fused', action='store_true', help='세 모델 대신 통합 모델(fused.pt) 사용')
+    parser.add_argument('--output', help='결과 JSON 저장 경로')
+    parser.add_argument('--baseline', help='비교할 기준 결과 JSON')
+    parser.add_argument('--tolerance', type=float, default=0.10, help='허용 성능 저하 비율 (기본 10%%)')
+    args = parser.parse_args()
+
+    frames = load_images(args.paths, parse_resolutions(args.resolutions))
+    if not frames:
+        print("벤치마크할 이미지가 없습니다.")
+        return 2
+
+    model = BlindNavigationModel(backend=args.backend, int8=args.int8 or None, threads=args.threads,
+                                 fused=args.fused or None)
+    stand_ins = install_stand_in_models(model, force=args.stand_in)
+    if stand_ins:
+        print(f"대용 모델 사용: {', '.join(stand_ins)}")
+
+    report = run_benchmark(model, frames, repeat=args.repeat, batch_size=args.batch_size, warmup=args.warmup)
+    report['config'] = {
+        'paths': args.paths,
+        'images': len(frames),
+        'repeat': args.repeat,
+        'batch_size': args.batch_size,
+        'resolutions': args.resolutions,
+        'backend': model.backend,
+        'int8': model.int8,
+        'threads': model.threads,
+        'fused': model.fused_model is not None,
+        'stand_in_models': stand_ins
+    }
+
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(report, baseline, args.tolerance)
+        if regressions:
+            print("❌ 기준 대비 성능 저하:")
+            for regression in regressions:
+                print(f"  - {regression}")
+            return 1
+        print("✓ 기준 대비 성능 저하 없음")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,96 @@
+import io
+import os
+import shutil
+import tarfile
+import tempfile
+import zipfile
+from contextlib import closing
+
+
+# 묶음 요청에서 이미지로 취급할 파일 확장자 (압축 파일 안의 다른 파일은 건너뜀)
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+
+ZIP_TYPES = ('application/zip', 'application/x-zip-compressed')
+TAR_TYPES = ('application/x-tar', 'application/gzip', 'application/x-gzip', 'application/x-gtar')
+
+# 압축 파일 한 항목의 최대 크기 (이보다 크면 읽지 않고 오류로 보고)
+MAX_IMAGE_BYTES = int(os.environ.get('API_MAX_IMAGE_BYTES', str(32 * 1024 * 1024)))
+
+
+class BulkImageError(Exception):
+    """묶음 요청의 이미지 하나를 읽을 수 없을 때 (나머지 이미지는 계속 처리)"""
+
+
+def archive_kind(filename, content_type):
+    """파일 이름/Content-Type으로 압축 형식 판단 ('zip', 'tar' 또는 None)"""
+    filename = (filename or '').lower()
+    if filename.endswith('.zip') or content_type in ZIP_TYPES:
+        return 'zip'
+    if filename.endswith(('.tar', '.tar.gz', '.tgz')) or content_type in TAR_TYPES:
+        return 'tar'
+    return None
+
+
+def is_image_name(name):
+    return name.lower().endswith(IMAGE_EXTENSIONS)
+
+
+def iter_images(parts):
+    """(이름, 파일 객체, Content-Type) 목록 -> (이름, 이미지 바이트 또는 BulkImageError)를 하나씩 생성
+
+    압축 파일은 항목을 하나씩 풀어 읽으므로 묶음 크기와 관계없이 한 번에 이미지 하나만 메모리에 올라감
+    각 파일 객체는 다 읽은 뒤 닫음
+    """
+    for name, fileobj, content_type in parts:
+        with closing(fileobj):
+            kind = archive_kind(name, content_type)
+            if kind == 'zip':
+                yield from _iter_zip(fileobj)
+            elif kind == 'tar':
+                yield from _iter_tar(fileobj)
+            else:
+                yield name, fileobj.read()
+
+
+def detach_upload(stream):
+    """요청이 끝나면 닫히는 업로드 파일 스트림을 응답을 스트리밍하는 동안에도 읽을 수 있게 분리
+
+    임시 파일에 저장된 업로드는 파일 디스크립터를 복제하고, 메모리에 있는 작은 업로드는 바이트를 복사
+    """
+    try:
+        fd = stream.fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return io.BytesIO(stream.read())
+    detached = os.fdopen(os.dup(fd), 'rb')
+    detached.seek(0)
+    return detached
+
+
+def _iter_zip(fileobj):
+    """zip 항목 읽기 (zip은 끝의 목록을 먼저 읽어야 하므로 되감을 수 없는 스트림은 임시 파일에 저장)"""
+    if not (hasattr(fileobj, 'seekable') and fileobj.seekable()):
+        spooled = tempfile.SpooledTemporaryFile(max_size=MAX_IMAGE_BYTES)
+        shutil.copyfileobj(fileobj, spooled)
+        spooled.seek(0)
+        fileobj = spooled
+
+    with zipfile.ZipFile(fileobj) as archive:
+        for info in archive.infolist():
+            if info.is_dir() or not is_image_name(info.filename):
+                continue
+            if info.file_size > MAX_IMAGE_BYTES:
+                yield info.filename, BulkImageError(f'image too large ({info.file_size} bytes)')
+                continue
+            yield info.filename, archive.read(info)
+
+
+def _iter_tar(fileobj):
+    """tar(.gz) 항목을 앞에서부터 순서대로 읽기 (스트리밍 모드라 되감지 않음)"""
+    with tarfile.open(fileobj=fileobj, mode='r|*') as archive:
+        for member in archive:
+            if not member.isfile() or not is_image_name(member.name):
+                continue
+            if member.size > MAX_IMAGE_BYTES:
+                yield member.name, BulkImageError(f'image too large ({member.size} bytes)')
+                continue
+            yield member.name, archive.extractfile(member).read()
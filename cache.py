@@ -0,0 +1,174 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResultCache:
+    def __init__(self, max_entries=256, ttl=3600.0, disk_dir=None, max_disk_bytes=256 * 1024 * 1024,
+                 sweep_interval=60.0):
+        """이미지 내용으로 찾는 감지 결과 LRU 캐시
+
+        max_entries: 메모리에 둘 최대 결과 수 (넘으면 가장 오래 안 쓴 것부터 제거)
+        ttl: 결과 유효 시간 (초)
+        disk_dir: 지정하면 결과를 JSON 파일로도 저장해 재시작 후에도 사용
+        max_disk_bytes: 디스크 결과 파일 합계 상한 (넘으면 가장 먼저 만료될 파일부터 삭제)
+        sweep_interval: 저장할 때 만료된 디스크 파일을 정리하는 최소 간격 (초)
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.sweep_interval = sweep_interval
+        self.hits = 0
+        self.misses = 0
+
+        self._entries = OrderedDict()  # 키 -> (만료 시각, 결과)
+        self._lock = threading.Lock()
+        # 디스크 파일 합계 (정리할 때 다시 셈) - 처음 저장할 때 기존 파일도 정리
+        self._disk_bytes = 0
+        self._next_sweep = 0.0
+        self._sweep_lock = threading.Lock()
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(image, grayscale, model_version):
+        """디코딩된 이미지 바이트 + 흑백 여부 + 모델 버전으로 만든 캐시 키 (모델 버전을 모르면 None - 캐시하지 않음)"""
+        if model_version is None:
+            return None
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(f'{image.shape}:{image.dtype}:{int(bool(grayscale))}:{model_version};'.encode())
+        digest.update(memoryview(image if image.flags.c_contiguous else image.copy()).cast('B'))
+        return digest.hexdigest()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def get(self, key):
+        """캐시된 결과 (없거나 만료되면 None)"""
+        if key is None:
+            with self._lock:
+                self.misses += 1
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+
+        value = self._read_disk(key, now)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._store(key, value, now)
+        return value
+
+    def put(self, key, value):
+        """결과 저장 (value는 JSON으로 저장 가능한 값, 키가 None이면 저장하지 않음)"""
+        if key is None:
+            return
+        now = time.time()
+        with self._lock:
+            self._store(key, value, now)
+        self._write_disk(key, value, now)
+
+    def _store(self, key, value, now):
+        self._entries[key] = (now + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f'{key}.json')
+
+    def _read_disk(self, key, now):
+        """디스크 결과 읽기 (파일 수정 시각 기준으로 TTL 적용)"""
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            if os.path.getmtime(path) + self.ttl <= now:
+                os.remove(path)
+                return None
+            with open(path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, key, value, now):
+        """임시 파일에 쓴 뒤 교체해 읽는 쪽이 반쯤 쓴 파일을 보지 않도록 함"""
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        temp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(value, f, ensure_ascii=False)
+                size = f.tell()
+            os.replace(temp_path, path)
+        except (OSError, TypeError) as e:
+            print(f"⚠️ 결과 캐시 저장 실패: {e}")
+            return
+
+        with self._lock:
+            self._disk_bytes += size
+            due = now >= self._next_sweep or self._disk_bytes > self.max_disk_bytes
+        if due:
+            self._sweep_disk(now)
+
+    def _sweep_disk(self, now):
+        """만료된 파일을 지우고, 합계가 max_disk_bytes를 넘으면 먼저 쓴(먼저 만료될) 파일부터 삭제"""
+        if not self._sweep_lock.acquire(blocking=False):
+            return  # 다른 스레드가 정리 중
+        try:
+            files = []
+            with os.scandir(self.disk_dir) as entries:
+                for entry in entries:
+                    # 중단된 저장이 남긴 임시 파일도 만료되면 지움
+                    if not entry.name.endswith(('.json', '.tmp')):
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    if stat.st_mtime + self.ttl <= now:
+                        _remove(entry.path)
+                    elif entry.name.endswith('.json'):
+                        files.append((stat.st_mtime, entry.name, stat.st_size))
+
+            total = sum(size for _, _, size in files)
+            if total > self.max_disk_bytes:
+                # 저장할 때마다 다시 정리하지 않도록 상한의 90%까지 줄임
+                limit = self.max_disk_bytes * 0.9
+                for _, name, size in sorted(files):
+                    if total <= limit:
+                        break
+                    _remove(os.path.join(self.disk_dir, name))
+                    total -= size
+
+            with self._lock:
+                self._disk_bytes = total
+                self._next_sweep = now + self.sweep_interval
+        except OSError as e:
+            print(f"⚠️ 결과 캐시 정리 실패: {e}")
+        finally:
+            self._sweep_lock.release()
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        # 다른 프로세스가 이미 지웠거나 교체 중
+        pass
@@ -0,0 +1,109 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class InferenceEngine:
+    def __init__(self, model, max_batch_size=8, max_wait=0.01):
+        """여러 클라이언트의 프레임을 모아 모델별 단일 배치로 추론하는 엔진"""
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait  # 배치를 채우기 위해 기다리는 최대 시간 (초)
+
+        self._queue = queue.Queue()
+        self._running = True
+        self._thread = threading.Thread(target=self._loop, name='inference-engine', daemon=True)
+        self._thread.start()
+
+    def submit(self, image, models=None, carried=None):
+        """프레임을 추론 대기열에 넣고 Future 반환 (models/carried는 BlindNavigationModel.detect와 동일)"""
+        future = Future()
+        self._queue.put((image, models, carried, future))
+        return future
+
+    def detect(self, image, models=None, carried=None):
+        """BlindNavigationModel.detect와 같은 형태로 결과를 기다려 반환"""
+        return self.submit(image, models, carried).result()
+
+    def pending(self):
+        """아직 배치에 들어가지 않은 프레임 수"""
+        return self._queue.qsize()
+
+    @property
+    def model_names(self):
+        return list(self.model.model_paths)
+
+    def is_ready(self):
+        """모델 로드/워밍업 완료 여부"""
+        return self.model.ready.is_set()
+
+    def status(self):
+        """모델별 로드 상태"""
+        return dict(self.model.load_status)
+
+    def model_version(self):
+        """가중치/설정이 바뀌면 달라지는 모델 버전 (로드 전이면 None)"""
+        return self.model.version
+
+    def add_stage_listener(self, callback):
+        """단계별 처리 시간을 받을 callback(stage, seconds) 등록"""
+        self.model.add_stage_listener(callback)
+
+    def stop(self):
+        """엔진 종료"""
+        self._running = False
+        self._queue.put(None)
+        self._thread.join()
+
+    def _collect_batch(self):
+        """첫 프레임을 받은 뒤 max_wait 동안 최대 max_batch_size개까지 모음"""
+        item = self._queue.get()
+        if item is None:
+            return []
+
+        batch = [item]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._running = False
+                break
+            batch.append(item)
+
+        return batch
+
+    def _loop(self):
+        """배치 단위 추론 루프"""
+        while self._running:
+            batch = self._collect_batch()
+            if not batch:
+                continue
+
+            # 실행할 모델 조합이 같은 프레임끼리 묶어 추론
+            groups = {}
+            for item in batch:
+                models = item[1]
+                groups.setdefault(None if models is None else tuple(sorted(models)), []).append(item)
+
+            for models, group in groups.items():
+                self._run_group(models, group)
+
+    def _run_group(self, models, group):
+        """같은 모델 조합의 프레임 묶음을 한 번에 추론하고 Future에 결과 전달"""
+        images = [image for image, _, _, _ in group]
+        carried = [carried for _, _, carried, _ in group]
+        try:
+            outputs = self.model.detect_batch(images, models, carried if any(carried) else None)
+        except Exception as e:
+            print(f"배치 추론 오류: {e}")
+            for _, _, _, future in group:
+                future.set_exception(e)
+            return
+
+        for (_, _, _, future), output in zip(group, outputs):
+            future.set_result(output)
@@ -1,145 +1,261 @@
-from ultralytics import YOLO
-import cv2
-import numpy as np
+import argparse
+import glob
+import json
 import os
+import queue
+import sys
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+from model import BlindNavigationModel
+from scheduler import ModelScheduler
+from video import VideoIngestor
+
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+VIDEO_EXTENSIONS = ('.mp4', '.mov', '.avi', '.mkv', '.m4v')
+
+
+def iter_sources(paths):
+    """디렉터리, glob, 파일 경로를 이미지/비디오 파일 경로로 펼침"""
+    for path in paths:
+        if os.path.isdir(path):
+            candidates = sorted(os.path.join(path, name) for name in os.listdir(path))
+        elif os.path.exists(path):
+            candidates = [path]
+        else:
+            candidates = sorted(glob.glob(path, recursive=True))
+
+        for candidate in candidates:
+            extension = os.path.splitext(candidate)[1].lower()
+            if extension in IMAGE_EXTENSIONS or extension in VIDEO_EXTENSIONS:
+                yield candidate
+
+
+def read_image(path):
+    """이미지 파일 디코딩 (실패하면 None)"""
+    image = cv2.imread(path, cv2.IMREAD_COLOR)
+    if image is None:
+        print(f"⚠️ 이미지를 읽을 수 없습니다: {path}")
+    return image
+
+
+def iter_video_frames(path, frame_stride=1):
+    """비디오 파일 프레임을 (프레임 번호, 이미지)로 순서대로 생성"""
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        print(f"⚠️ 비디오를 열 수 없습니다: {path}")
+        return
+    try:
+        index = 0
+        while True:
+            ok, frame = capture.read()
+            if not ok:
+                break
+            if index % frame_stride == 0:
+                yield index, frame
+            index += 1
+    finally:
+        capture.release()
+
+
+def prefetch(iterator, depth):
+    """백그라운드 스레드에서 iterator를 최대 depth개 앞서 읽어 둠"""
+    buffer = queue.Queue(maxsize=depth)
+    sentinel = object()
+
+    def producer():
+        try:
+            for item in iterator:
+                buffer.put(item)
+        finally:
+            buffer.put(sentinel)
+
+    threading.Thread(target=producer, daemon=True).start()
+    while True:
+        item = buffer.get()
+        if item is sentinel:
+            return
+        yield item
+
+
+def iter_frames(paths, decode_workers, frame_stride=1):
+    """모든 입력을 (원본 경로, 프레임 번호, 이미지)로 생성 - 이미지는 여러 스레드에서 미리 디코딩"""
+    with ThreadPoolExecutor(max_workers=decode_workers, thread_name_prefix='decode') as decoder:
+        pending = deque()  # 순서를 지키면서 decode_workers * 2개까지 미리 디코딩
+
+        for path in iter_sources(paths):
+            if path.lower().endswith(VIDEO_EXTENSIONS):
+                # 비디오 앞에 대기 중인 이미지를 먼저 내보내 순서 유지
+                while pending:
+                    image_path, future = pending.popleft()
+                    image = future.result()
+                    if image is not None:
+                        yield image_path, None, image
+                for index, frame in prefetch(iter_video_frames(path, frame_stride), decode_workers * 2):
+                    yield path, index, frame
+                continue
+
+            pending.append((path, decoder.submit(read_image, path)))
+            if len(pending) >= decode_workers * 2:
+                image_path, future = pending.popleft()
+                image = future.result()
+                if image is not None:
+                    yield image_path, None, image
+
+        while pending:
+            image_path, future = pending.popleft()
+            image = future.result()
+            if image is not None:
+                yield image_path, None, image
+
+
+def batched(iterator, batch_size):
+    """iterator를 batch_size개씩 묶음"""
+    batch = []
+    for item in iterator:
+        batch.append(item)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
 
-# --- 1. 경로 설정 및 다중 모델 로딩 ---
-model_path_block = "./block.pt"
-model_path_scooter = "./scooter.pt"
-model_path_button = "./button.pt"
-image_path = "/Users/leeyoungmin/Desktop/ss/img/art_17306089943438_dbdbda.jpg"
-output_path = "output/braille_navigation_result_multi_model.jpg"
-
-print("모델을 로드합니다...")
-model_block = YOLO(model_path_block)
-model_scooter = YOLO(model_path_scooter)
-model_button = YOLO(model_path_button)
-
-image = cv2.imread(image_path)
-if image is None:
-    raise IOError(f"이미지를 로드하는 데 실패했습니다: {image_path}")
-output = image.copy()
-
-h, w, _ = image.shape
-arrow_length = int(np.sqrt(h**2 + w**2) * 0.15)
-arrow_thickness = max(2, int(w / 120))
-
-# --- 2. 개별 모델 추론 수행 ---
-print("각 모델에 대해 객체 탐지를 수행합니다...")
-results_block = model_block(image_path)[0]
-results_scooter = model_scooter(image_path)[0]
-results_button = model_button(image_path)[0]  # 🔺 음향 신호기 모델
-
-# --- 3. 보조 함수 ---
-def merge_close_boxes(boxes, iou_threshold=0.7):
-    if not boxes: return []
-    boxes = sorted(boxes, key=lambda b: (b[2]-b[0])*(b[3]-b[1]), reverse=True)
-    merged, remaining = [], list(boxes)
-    while remaining:
-        base = remaining.pop(0)
-        temp = []
-        for other in remaining:
-            xA = max(base[0], other[0]); yA = max(base[1], other[1])
-            xB = min(base[2], other[2]); yB = min(base[3], other[3])
-            inter_area = max(0, xB - xA) * max(0, yB - yA)
-            if inter_area > 0:
-                base_area = (base[2]-base[0])*(base[3]-base[1]); other_area = (other[2]-other[0])*(other[3]-other[1])
-                iou = inter_area / float(base_area + other_area - inter_area)
-                if iou < iou_threshold: temp.append(other)
-            else: temp.append(other)
-        merged.append(base); remaining = temp
-    return merged
-
-def get_box_center(box):
-    return np.array([(box[0] + box[2]) // 2, (box[1] + box[3]) // 2])
-
-def get_angle_between(v1, v2):
-    norm_v1 = np.linalg.norm(v1)
-    norm_v2 = np.linalg.norm(v2)
-    if norm_v1 == 0 or norm_v2 == 0: return 180.0
-    dot_product = np.dot(v1, v2)
-    cos_angle = dot_product / (norm_v1 * norm_v2)
-    return np.degrees(np.arccos(np.clip(cos_angle, -1.0, 1.0)))
-
-# --- 4. 블록 모델 결과 처리 및 경로 분석 ---
-initial_stop_boxes, go_boxes = [], []
-for box_data in results_block.boxes:
-    cls_id, box = int(box_data.cls[0]), box_data.xyxy[0].cpu().numpy().astype(int)
-    if cls_id == 1: initial_stop_boxes.append(box)
-    else: go_boxes.append(box)
-stop_boxes = merge_close_boxes(initial_stop_boxes)
-
-# 경로 분석 및 화살표 그리기
-if stop_boxes and go_boxes:
-    print(f"--- 교차로 {len(stop_boxes)}개 발견. 경로 분석 시작 ---")
-    for stop_box in stop_boxes:
-        stop_center = get_box_center(stop_box)
-        proximity_threshold = (stop_box[2] - stop_box[0]) * 3.0
-        candidate_vectors = [get_box_center(go_box) - stop_center for go_box in go_boxes if 0 < np.linalg.norm(get_box_center(go_box) - stop_center) < proximity_threshold]
-
-        if not candidate_vectors: continue
-
-        unique_direction_groups = []
-        angle_threshold = 45
-        for vec in candidate_vectors:
-            is_new_group = True
-            for group in unique_direction_groups:
-                if get_angle_between(vec, group[0]) < angle_threshold: group.append(vec); is_new_group = False; break
-            if is_new_group: unique_direction_groups.append([vec])
-
-        clustered_directions = [np.mean(group, axis=0) for group in unique_direction_groups]
+
+def output_image_path(output_dir, source_path, frame_index):
+    """결과 이미지 저장 경로 (비디오는 프레임 번호 포함)
+
+    입력 경로의 디렉터리 구조와 확장자를 이름에 남겨 a/1.jpg와 b/1.jpg, x.jpg와 x.png가 겹치지 않게 함
+    (현재 디렉터리 밖의 입력은 절대 경로 기준)
+    """
+    source_path = os.path.abspath(source_path)
+    relative = os.path.relpath(source_path)
+    if relative == os.pardir or relative.startswith(os.pardir + os.sep):
+        relative = os.path.splitdrive(source_path)[1].lstrip(os.sep)
+    stem, extension = os.path.splitext(relative)
+    stem = f'{stem}_{extension.lstrip(".")}'
+    if frame_index is None:
+        return os.path.join(output_dir, f'{stem}_result.jpg')
+    return os.path.join(output_dir, f'{stem}_{frame_index:06d}.jpg')
+
+
+def write_image(path, image):
+    """결과 이미지 저장 (필요하면 하위 디렉터리 생성) - 성공 여부 반환"""
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return cv2.imwrite(path, image)
+    except (OSError, cv2.error) as e:
+        print(f"⚠️ 결과 이미지 저장 오류 ({path}): {e}")
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description='디렉터리/glob/비디오 일괄 도로 안내 분석')
+    parser.add_argument('paths', nargs='*', help='이미지 디렉터리, glob 패턴, 이미지 또는 비디오 파일')
+    parser.add_argument('--output-dir', default='output', help='결과 이미지 저장 디렉터리')
+    parser.add_argument('--jsonl', help='네비게이션 결과 JSONL 경로 (기본: <output-dir>/results.jsonl)')
+    parser.add_argument('--batch-size', type=int, default=8, help='모델별 한 번에 추론할 프레임 수')
+    parser.add_argument('--decode-workers', type=int, default=4, help='이미지 디코딩 스레드 수')
+    parser.add_argument('--writer-workers', type=int, default=4, help='결과 이미지 저장 스레드 수')
+    parser.add_argument('--frame-stride', type=int, default=1, help='비디오에서 N 프레임마다 하나만 분석')
+    parser.add_argument('--no-images', action='store_true', help='결과 이미지를 저장하지 않고 JSONL만 기록')
+    parser.add_argument('--stream', action='append', default=[],
+                        help='실시간 입력 (카메라 번호, RTSP/MJPEG URL) 또는 실시간 속도로 처리할 비디오 파일')
+    parser.add_argument('--reuse-threshold', type=float, default=3.0,
+                        help='직전 추론 프레임과의 평균 밝기 차이가 이 값 미만이면 결과 재사용 (0이면 끔)')
+    parser.add_argument('--scooter-every', type=int, default=0,
+                        help='스트림 입력에서 스쿠터 모델을 N 프레임마다 실행하고, Stop 블록이 보일 때만 음향 신호기 모델 실행 (0이면 끔)')
+    args = parser.parse_args()
+
+    if not args.paths and not args.stream:
+        parser.error('분석할 입력(paths 또는 --stream)이 필요합니다')
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    jsonl_path = args.jsonl or os.path.join(args.output_dir, 'results.jsonl')
+
+    print("모델을 로드합니다...")
+    model = BlindNavigationModel()
+
+    processed = 0
+    failed_writes = []
+
+    def finish_write(pending):
+        image_path, future = pending
+        if not future.result():
+            print(f"⚠️ 결과 이미지를 저장하지 못했습니다: {image_path}")
+            failed_writes.append(image_path)
+
+    with open(jsonl_path, 'w', encoding='utf-8') as jsonl, \
+            ThreadPoolExecutor(max_workers=args.writer_workers, thread_name_prefix='writer') as writer:
+        pending_writes = deque()
+
+        frames = iter_frames(args.paths, args.decode_workers, args.frame_stride)
+        for batch in batched(frames, args.batch_size):
+            images = [image for _, _, image in batch]
+
+            if args.no_images:
+                outputs = [(output, None) for output in model.detect_batch(images)]
+            else:
+                outputs = model.detect_and_draw_batch(images)
+
+            for (source_path, frame_index, _), (output, result_img) in zip(batch, outputs):
+                _, detected_classes, detected_boxes, navigation_info, arrow_info = output
+
+                record = {
+                    'source': source_path,
+                    'frame': frame_index,
+                    'classes': detected_classes,
+                    'boxes': detected_boxes,
+                    'navigation': navigation_info,
+                    'arrows': arrow_info
+                }
+
+                if result_img is not None:
+                    image_path = output_image_path(args.output_dir, source_path, frame_index)
+                    record['output'] = image_path
+                    pending_writes.append((image_path, writer.submit(write_image, image_path, result_img)))
+
+                jsonl.write(json.dumps(record, ensure_ascii=False) + '\n')
+                processed += 1
+
+            # 저장 대기 이미지가 너무 쌓이지 않도록 제한
+            while len(pending_writes) > args.writer_workers * args.batch_size:
+                finish_write(pending_writes.popleft())
+
+        # 스트림 입력: 백그라운드 디코딩, 추론 속도에 맞춘 건너뛰기, 유사 프레임 결과 재사용
+        for source in args.stream:
+            scheduler = ModelScheduler(model.model_paths, scooter_every=args.scooter_every) if args.scooter_every else None
+            ingestor = VideoIngestor(model, source, realtime=True, diff_threshold=args.reuse_threshold,
+                                     scheduler=scheduler)
+            for frame_index, frame, output, reused in ingestor:
+                _, detected_classes, detected_boxes, navigation_info, arrow_info = output
+                record = {
+                    'source': str(source),
+                    'frame': frame_index,
+                    'reused': reused,
+                    'classes': detected_classes,
+                    'boxes': detected_boxes,
+                    'navigation': navigation_info,
+                    'arrows': arrow_info
+                }
+                jsonl.write(json.dumps(record, ensure_ascii=False) + '\n')
+                processed += 1
+            print(f"스트림 {source}: {ingestor.stats}")
+            if scheduler is not None:
+                print(f"  건너뛴 모델 실행: {scheduler.stats['skipped']}")
         
-        final_directions_to_draw = []
-        if clustered_directions:
-            forward_looking_directions = [vec for vec in clustered_directions if (vec / (np.linalg.norm(vec) + 1e-6))[1] < 0.5]
-            if forward_looking_directions:
-                anchor_vec = min(forward_looking_directions, key=lambda v: v[1])
-                final_directions_to_draw.append(anchor_vec)
-                for vec in forward_looking_directions:
-                    if not np.array_equal(vec, anchor_vec) and get_angle_between(anchor_vec, vec) < 140:
-                        final_directions_to_draw.append(vec)
-
-        for vec in final_directions_to_draw:
-            norm_vec = vec / (np.linalg.norm(vec) + 1e-6)
-            endpoint = stop_center + (norm_vec * arrow_length)
-            cv2.arrowedLine(output, tuple(stop_center.astype(int)), tuple(endpoint.astype(int)), (255, 255, 0), arrow_thickness, tipLength=0.25)
-    cv2.putText(output, "State : Intersection", (20, 40), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 255, 0), 2)
-else:
-    if go_boxes:
-        all_path_points = []
-        for box in go_boxes:
-            x1, y1, x2, y2 = box; step = (y2 - y1) // 4
-            if step > 0: all_path_points.extend([np.array([(x1+x2)//2, y1+i*step+step//2]) for i in range(4)])
-            else: all_path_points.append(get_box_center(box))
-        if len(all_path_points) >= 2:
-            all_path_points.sort(key=lambda pt: pt[1], reverse=True)
-            for i in range(len(all_path_points) - 1):
-                pt1, pt2 = all_path_points[i], all_path_points[i+1]
-                if pt1[1] > pt2[1]:
-                    straight_arrow_thickness = max(1, arrow_thickness - 1)
-                    cv2.arrowedLine(output, tuple(pt1.astype(int)), tuple(pt2.astype(int)), (255, 0, 0), straight_arrow_thickness, tipLength=0.3)
-    cv2.putText(output, "State : Straight", (20, 40), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 255, 255), 2)
-
-
-# --- 5. 스쿠터 모델 결과 처리 및 시각화 ---
-print(f"--- 장애물 탐지: {len(results_scooter.boxes)}개의 잠재적 스쿠터 발견 ---")
-for box in results_scooter.boxes:
-    confidence = float(box.conf[0])
-    if confidence > 0.5:
-        x1, y1, x2, y2 = box.xyxy[0].cpu().numpy().astype(int)
-        obstacle_color = (255, 0, 255)
-        cv2.rectangle(output, (x1, y1), (x2, y2), obstacle_color, arrow_thickness)
-        label = f"Scooter: {confidence:.2f}"
-        cv2.putText(output, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.8, obstacle_color, 2)
-
-
-# --- 6. 음향 신호기 존재 여부 판단 ---
-button_detected = len(results_button.boxes) > 0
-button_text = "Sound Button: Detected" if button_detected else "Sound Button: Not Detected"
-button_color = (0, 255, 200) if button_detected else (100, 100, 100)
-cv2.putText(output, button_text, (w - 350, 40), cv2.FONT_HERSHEY_SIMPLEX, 1.0, button_color, 2)
-print(f"음향 신호기 감지 여부: {button_detected}")
-
-# --- 7. 결과 저장 ---
-cv2.imwrite(output_path, output)
-print(f"결과 이미지가 '{output_path}'에 저장되었습니다.")
\ No newline at end of file
+        for pending in pending_writes:
+            finish_write(pending)
+
+    print(f"{processed}개 프레임을 분석했습니다. 결과: {jsonl_path}")
+    if failed_writes:
+        print(f"❌ 결과 이미지 {len(failed_writes)}개를 저장하지 못했습니다")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
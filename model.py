@@ -2,12 +2,174 @@ import cv2
 import numpy as np
 import torch
 import os
-from ultralytics import YOLO
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager, nullcontext
+from backends import load_model, weights_version
+from preprocess import LetterboxPreprocessor, LetterboxTransform
 
-class BlindNavigationModel:
+
+# 블록 모델 클래스 ID -> 이름
+BLOCK_CLASS_NAMES = {0: 'Go_Forward', 1: 'Stop'}
+
+# 통합 모델 클래스 이름 -> (원래 모델 이름, 원래 모델의 클래스 ID)
+FUSED_CLASS_MAP = {
+    'Go_Forward': ('block', 0),
+    'Stop': ('block', 1),
+    'Scooter': ('scooter', 0),
+    'Sound_Button': ('button', 0)
+}
+
+
+def _to_numpy(values):
+    """torch 텐서 또는 배열을 NumPy 배열로 변환"""
+    if hasattr(values, 'cpu'):
+        values = values.cpu().numpy()
+    return np.asarray(values)
+
+
+class Detections:
+    """YOLO 결과에서 한 번만 꺼낸 배열 기반 감지 기록 (xyxy, conf, cls)"""
+    __slots__ = ('xyxy', 'conf', 'cls', 'model')
+    
+    def __init__(self, xyxy, conf, cls, model):
+        self.xyxy = xyxy    # (N, 4) int 좌표
+        self.conf = conf    # (N,) float64 신뢰도
+        self.cls = cls      # (N,) int 클래스 ID
+        self.model = model  # 모델 이름
+    
+    def __len__(self):
+        return len(self.conf)
+    
+    @classmethod
+    def empty(cls, model):
+        return cls(np.empty((0, 4), dtype=int), np.empty(0), np.empty(0, dtype=int), model)
+    
+    @classmethod
+    def from_results(cls, results, threshold, model, transform=None):
+        """결과 텐서를 한 번에 NumPy로 옮기고 신뢰도 마스크로 필터링
+        
+        transform: 공유 전처리 입력 좌표를 원본 좌표로 되돌릴 LetterboxTransform
+        """
+        if results is None or results.boxes is None or len(results.boxes) == 0:
+            return cls.empty(model)
+        
+        boxes = results.boxes
+        conf = _to_numpy(boxes.conf).astype(np.float64)
+        mask = conf >= threshold
+        xyxy = _to_numpy(boxes.xyxy)[mask]
+        if transform is not None:
+            xyxy = transform.to_original(xyxy)
+        xyxy = np.ascontiguousarray(xyxy.astype(int))
+        class_ids = _to_numpy(boxes.cls)[mask].astype(int)
+        return cls(xyxy, conf[mask], class_ids, model)
+    
+    @classmethod
+    def from_records(cls, records, model):
+        """API 박스 딕셔너리 목록(detected_boxes)에서 해당 모델의 감지 기록 복원"""
+        block_class_ids = {name: cls_id for cls_id, name in BLOCK_CLASS_NAMES.items()}
+        records = [record for record in records if record['model'] == model]
+        if not records:
+            return cls.empty(model)
+        
+        class_ids = []
+        for record in records:
+            class_name = record['class']
+            if class_name in block_class_ids:
+                class_ids.append(block_class_ids[class_name])
+            elif class_name.startswith('Block_Class_'):
+                class_ids.append(int(class_name[len('Block_Class_'):]))
+            else:
+                class_ids.append(0)
+        
+        xyxy = np.array([record['box'] for record in records], dtype=int).reshape(-1, 4)
+        conf = np.array([record['confidence'] for record in records], dtype=np.float64)
+        return cls(xyxy, conf, np.array(class_ids, dtype=int), model)
+    
+    def select(self, mask):
+        """마스크에 해당하는 감지만 남긴 새 기록"""
+        return Detections(self.xyxy[mask], self.conf[mask], self.cls[mask], self.model)
+
+
+class StageProfile:
+    """profile() 블록 동안 기록된 단계별 처리 시간 모음"""
+    
     def __init__(self):
-        """시각장애인 도로 안내를 위한 다중 YOLO 모델 초기화"""
-        print("다중 YOLO 모델 로딩 중...")
+        self.stages = {}  # 단계 이름 -> 시간 목록 (초)
+        self._lock = threading.Lock()
+    
+    def __call__(self, stage, seconds):
+        with self._lock:
+            self.stages.setdefault(stage, []).append(seconds)
+    
+    def summary(self):
+        """단계별 호출 수, 합계, 평균 (초)"""
+        with self._lock:
+            return {
+                stage: {'count': len(times), 'total': sum(times), 'mean': sum(times) / len(times)}
+                for stage, times in self.stages.items()
+            }
+
+
+class _StageTimer:
+    """단계 실행 시간을 재서 모델의 리스너에 전달"""
+    __slots__ = ('model', 'stage', 'start')
+    
+    def __init__(self, model, stage):
+        self.model = model
+        self.stage = stage
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.model._record_stage(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+# 리스너가 없을 때 재사용하는 빈 컨텍스트 (계측 비용 없음)
+_NULL_STAGE = nullcontext()
+
+
+class SceneAnalysis:
+    """프레임당 한 번 계산하는 경로 분석 결과 (화살표 정보, 서버 렌더링, 네비게이션 상태가 공유)"""
+    __slots__ = ('stop_boxes', 'go_boxes', 'has_forward', 'intersection_arrows', 'path_starts', 'path_ends')
+    
+    def __init__(self, stop_boxes, go_boxes, has_forward, intersection_arrows, path_starts, path_ends):
+        self.stop_boxes = stop_boxes                    # 병합된 Stop 박스 (N, 4)
+        self.go_boxes = go_boxes                        # Stop 이외의 블록 박스 (N, 4)
+        self.has_forward = has_forward                  # Go_Forward 클래스 감지 여부
+        self.intersection_arrows = intersection_arrows  # 교차로 화살표 [(시작점, 끝점), ...]
+        self.path_starts = path_starts                  # 직진 경로 선분 시작점 (N, 2)
+        self.path_ends = path_ends                      # 직진 경로 선분 끝점 (N, 2)
+    
+    @property
+    def layout(self):
+        """화살표 기준 상황: 'intersection', 'straight' 또는 None"""
+        if len(self.stop_boxes) and len(self.go_boxes):
+            return 'intersection'
+        if len(self.go_boxes):
+            return 'straight'
+        return None
+
+
+class BlindNavigationModel:
+    def __init__(self, max_workers=None, backend=None, int8=None, threads=None, fused=None,
+                 background=False, warmup=None):
+        """시각장애인 도로 안내를 위한 다중 YOLO 모델 초기화
+        
+        backend: 'torch'(기본), 'onnx', 'openvino' - 지정하지 않으면 MODEL_BACKEND 환경 변수
+        int8: INT8 양자화 모델 사용 여부 (MODEL_INT8), threads: CPU 추론 스레드 수 (MODEL_THREADS)
+        fused: 세 모델 대신 통합 모델(fused.pt) 하나로 추론 (MODEL_FUSED)
+        background: 모델을 백그라운드에서 병렬 로드하고 바로 반환 (준비 완료는 ready 이벤트로 확인)
+        warmup: 로드 후 빈 프레임으로 한 번 추론해 첫 프레임 지연 제거 (기본: background와 같음)
+        """
+        self.backend = backend or os.environ.get('MODEL_BACKEND', 'torch')
+        self.int8 = int8 if int8 is not None else os.environ.get('MODEL_INT8', '0') == '1'
+        self.threads = threads or int(os.environ.get('MODEL_THREADS', '0')) or None
         
         # 모델 경로 설정
         self.model_paths = {
@@ -16,161 +178,461 @@ class BlindNavigationModel:
             'button': './button.pt'
         }
         
-        # 모델 로드
-        self.models = {}
-        for model_name, model_path in self.model_paths.items():
-            try:
-                if os.path.exists(model_path):
-                    self.models[model_name] = YOLO(model_path)
-                    print(f"✓ {model_name} 모델 로드 완료: {model_path}")
-                else:
-                    print(f"⚠️ {model_name} 모델 파일을 찾을 수 없습니다: {model_path}")
-                    self.models[model_name] = None
-            except Exception as e:
-                print(f"❌ {model_name} 모델 로드 실패: {e}")
-                self.models[model_name] = None
+        # 통합 모델 (Go_Forward, Stop, Scooter, Sound_Button을 한 번에 감지)
+        self.fused_model_path = './fused.pt'
+        self.fused_model = None
+        self._use_fused = fused if fused is not None else os.environ.get('MODEL_FUSED', '0') == '1'
+        
+        # 모델은 _load_models()에서 채움 (로드 전/실패/파일 없음은 None)
+        self.models = {model_name: None for model_name in self.model_paths}
+        self.load_status = {model_name: 'pending' for model_name in self.model_paths}
+        self.ready = threading.Event()
+        self.version = None
+        
+        # 오류 메시지용 모델 이름
+        self.model_labels = {
+            'block': '블록',
+            'scooter': '스쿠터',
+            'button': '음향 신호기'
+        }
         
         # 신뢰도 임계값
         self.conf_threshold = 0.7
+        self.model_conf_thresholds = {
+            'block': self.conf_threshold,
+            'scooter': 0.5,  # 스쿠터 모델만 임계값 낮게(인식 잘 안됨)
+            'button': self.conf_threshold
+        }
+        
+        # 입력 텐서를 프레임당 한 번만 만들어 모든 모델이 공유 (MODEL_SHARED_PREPROCESS=0이면 모델별 전처리)
+        self.shared_preprocess = os.environ.get('MODEL_SHARED_PREPROCESS', '1') != '0'
+        self.preprocessor = LetterboxPreprocessor()
         
-        print("모델 초기화 완료!")
+        # 모델별 입력 크기(None이면 기본 640)와 ROI (프레임 대비 비율 x1, y1, x2, y2) - 설정이 같은 모델끼리 입력 공유
+        # 예) MODEL_INPUTS='{"block": {"imgsz": 480, "roi": [0, 0.4, 1, 1]}, "button": {"imgsz": 960, "roi": [0, 0, 1, 0.6]}}'
+        self.model_inputs = {model_name: {'imgsz': None, 'roi': None} for model_name in list(self.model_paths) + ['fused']}
+        for model_name, config in json.loads(os.environ.get('MODEL_INPUTS', '{}')).items():
+            self.set_model_input(model_name, **config)
+        
+        # 세 모델을 동시에 실행하기 위한 스레드 풀 (모델 인스턴스별 잠금)
+        self._model_locks = {model_name: threading.Lock() for model_name in self.model_paths}
+        self._fused_lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers or len(self.model_paths),
+                                           thread_name_prefix='yolo')
+        
+        # 단계별 처리 시간 리스너 - callback(stage, seconds), 없으면 계측하지 않음
+        self._stage_listeners = []
+        
+        self._warmup = background if warmup is None else warmup
+        if background:
+            threading.Thread(target=self._load_models, name='model-loader', daemon=True).start()
+        else:
+            self._load_models()
+    
+    def _load_models(self):
+        """모델을 병렬로 로드하고 (설정 시) 워밍업한 뒤 ready 설정"""
+        print(f"다중 YOLO 모델 로딩 중... (백엔드: {self.backend}{', INT8' if self.int8 else ''})")
+        start = time.perf_counter()
+        
+        if self._use_fused:
+            self.fused_model = self._load_fused_model()
+        
+        if self.fused_model is not None:
+            for model_name in self.model_paths:
+                self.load_status[model_name] = 'fused'  # 통합 모델이 대신 감지
+        else:
+            futures = {
+                model_name: self.executor.submit(self._load_model, model_name, model_path)
+                for model_name, model_path in self.model_paths.items()
+            }
+            for model_name, future in futures.items():
+                self.models[model_name] = future.result()
+        
+        if self._warmup:
+            self.warmup()
+        
+        self.version = self._compute_version()
+        self.ready.set()
+        print(f"모델 초기화 완료! ({time.perf_counter() - start:.1f}초)")
+    
+    def _compute_version(self):
+        """결과 캐시 키 등에 쓰는 모델 버전 (가중치 파일이나 추론 설정이 바뀌면 달라짐)"""
+        return weights_version(
+            list(self.model_paths.values()) + [self.fused_model_path],
+            self.backend, self.int8, self.fused_model is not None, self.model_inputs, self.model_conf_thresholds)
+    
+    def _load_model(self, model_name, model_path):
+        """모델 하나 로드 (파일이 없거나 실패하면 None)"""
+        try:
+            if not os.path.exists(model_path):
+                print(f"⚠️ {model_name} 모델 파일을 찾을 수 없습니다: {model_path}")
+                self.load_status[model_name] = 'missing'
+                return None
+            model = load_model(model_path, self.backend, self.int8, self.threads)
+            print(f"✓ {model_name} 모델 로드 완료: {model_path}")
+            self.load_status[model_name] = 'loaded'
+            return model
+        except Exception as e:
+            print(f"❌ {model_name} 모델 로드 실패: {e}")
+            self.load_status[model_name] = 'failed'
+            return None
+    
+    def warmup(self, width=640, height=480):
+        """빈 프레임으로 로드된 모든 모델을 한 번 실행 (첫 추론의 초기화 비용을 미리 지불)"""
+        start = time.perf_counter()
+        try:
+            self.detect(np.zeros((height, width, 3), dtype=np.uint8))
+        except Exception as e:
+            print(f"⚠️ 워밍업 실패: {e}")
+            return
+        for model_name, status in self.load_status.items():
+            if status in ('loaded', 'fused'):
+                self.load_status[model_name] = 'warm'
+        print(f"✓ 워밍업 완료 ({time.perf_counter() - start:.2f}초)")
+    
+    def _load_fused_model(self):
+        """통합 모델 로드 후 클래스 ID별 (모델 이름, 원래 클래스 ID) 조회표 생성 - 실패하면 None"""
+        if not os.path.exists(self.fused_model_path):
+            print(f"⚠️ 통합 모델 파일을 찾을 수 없습니다: {self.fused_model_path} (개별 모델 사용)")
+            return None
+        try:
+            fused_model = load_model(self.fused_model_path, self.backend, self.int8, self.threads)
+        except Exception as e:
+            print(f"❌ 통합 모델 로드 실패: {e} (개별 모델 사용)")
+            return None
+        
+        # 통합 모델의 클래스 이름으로 매핑 (이름이 없으면 FUSED_CLASS_MAP 순서)
+        class_names = getattr(fused_model, 'names', None) or dict(enumerate(FUSED_CLASS_MAP))
+        self._fused_classes = {
+            class_id: FUSED_CLASS_MAP[name] for class_id, name in class_names.items() if name in FUSED_CLASS_MAP
+        }
+        print(f"✓ 통합 모델 로드 완료: {self.fused_model_path}")
+        return fused_model
+    
+    def set_model_input(self, model_name, imgsz=None, roi=None):
+        """모델 입력 크기(imgsz)와 ROI(프레임 대비 비율 x1, y1, x2, y2, None이면 전체) 설정"""
+        config = self.model_inputs[model_name]
+        if imgsz is not None:
+            config['imgsz'] = int(imgsz)
+        config['roi'] = tuple(float(value) for value in roi) if roi is not None else None
+        if self.ready.is_set():
+            # 입력 설정이 바뀌면 이전 결과를 캐시에서 쓰지 않도록 버전 갱신 (로드 중이면 로드 끝에 계산)
+            self.version = self._compute_version()
+    
+    def add_stage_listener(self, callback):
+        """단계별 처리 시간을 받을 callback(stage, seconds) 등록"""
+        self._stage_listeners = self._stage_listeners + [callback]
+    
+    def remove_stage_listener(self, callback):
+        """등록한 단계 리스너 제거"""
+        self._stage_listeners = [listener for listener in self._stage_listeners if listener is not callback]
+    
+    @contextmanager
+    def profile(self):
+        """with 블록 동안의 단계별 처리 시간을 StageProfile로 수집"""
+        stage_profile = StageProfile()
+        self.add_stage_listener(stage_profile)
+        try:
+            yield stage_profile
+        finally:
+            self.remove_stage_listener(stage_profile)
+    
+    def _stage(self, stage):
+        """단계 시간 측정 컨텍스트 (리스너가 없으면 아무 것도 하지 않음)"""
+        if not self._stage_listeners:
+            return _NULL_STAGE
+        return _StageTimer(self, stage)
+    
+    def _record_stage(self, stage, seconds):
+        for listener in self._stage_listeners:
+            listener(stage, seconds)
+    
+    def _record_model_speed(self, model_name, results):
+        """ultralytics 결과의 전처리/추론/후처리 시간(ms)을 이미지별로 기록"""
+        for result in results:
+            speed = getattr(result, 'speed', None) or {}
+            for phase in ('preprocess', 'inference', 'postprocess'):
+                if speed.get(phase) is not None:
+                    self._record_stage(f'{model_name}.{phase}', speed[phase] / 1000.0)
+    
+    def detect(self, image, models=None, carried=None):
+        """이미지에서 다중 모델로 객체 감지
+        
+        models: 실행할 모델 이름 목록 (None이면 전부)
+        carried: 실행하지 않은 모델 대신 사용할 {모델 이름: Detections} (예: 추적기가 이어 준 박스)
+        """
+        return self.detect_batch([image], models, [carried] if carried else None)[0]
+    
+    def detect_batch(self, images, models=None, carried=None):
+        """여러 이미지를 모델별 한 번의 배치 추론으로 감지 (세 모델은 병렬 실행)"""
+        per_image_results = self._infer_batch(images, models)
+        if carried:
+            for model_results, carried_detections in zip(per_image_results, carried):
+                for model_name, detections in (carried_detections or {}).items():
+                    model_results.setdefault(model_name, detections)
+        
+        return [
+            self._postprocess(image, model_results)[0]
+            for image, model_results in zip(images, per_image_results)
+        ]
+    
+    def detect_and_draw_batch(self, images):
+        """배치 감지 후 이미지마다 (감지 결과, 박스/화살표를 그린 이미지) 반환"""
+        outputs = []
+        for image, model_results in zip(images, self._infer_batch(images)):
+            output, detections, scene = self._postprocess(image, model_results)
+            outputs.append((output, self._draw_results(image, detections, scene)))
+        return outputs
+    
+    def _infer_batch(self, images, models=None):
+        """모델별 배치 추론을 실행하고 이미지별 {모델 이름: 결과} 목록 반환"""
+        if not images:
+            return []
+        
+        if self.fused_model is not None:
+            with self._prepared_inputs(images, 'fused') as (inputs, transforms):
+                return self._infer_fused_batch(inputs, models, transforms)
+        
+        # 입력 설정(크기, ROI)이 같은 모델끼리 입력을 한 번만 준비
+        groups = {}
+        for model_name in self.model_paths:
+            if models is not None and model_name not in models:
+                continue
+            if self.models.get(model_name):
+                config = self.model_inputs[model_name]
+                groups.setdefault((config['imgsz'], config['roi']), []).append(model_name)
+        
+        per_image_results = [{} for _ in images]
+        with ExitStack() as stack:
+            # 모델별 배치 추론을 스레드 풀에서 동시에 실행
+            futures = {}
+            for group in groups.values():
+                inputs, transforms = stack.enter_context(self._prepared_inputs(images, group[0]))
+                for model_name in group:
+                    futures[model_name] = (self.executor.submit(self._run_model, model_name, inputs), transforms)
+            
+            for model_name, (future, transforms) in futures.items():
+                results = future.result()
+                for index, model_results in enumerate(per_image_results):
+                    result = results[index] if results is not None else None
+                    if transforms is not None and result is not None:
+                        result = Detections.from_results(
+                            result, self.model_conf_thresholds[model_name], model_name, transforms[index])
+                    model_results[model_name] = result
+        
+        return per_image_results
     
-    def detect(self, image):
-        """이미지에서 다중 모델로 객체 감지"""
+    @contextmanager
+    def _prepared_inputs(self, images, model_name):
+        """모델 입력 설정에 맞춰 (모델 입력, 이미지별 좌표 변환 또는 None) 준비"""
+        config = self.model_inputs[model_name]
+        imgsz, roi = config['imgsz'], config['roi']
+        
+        # ROI는 복사하지 않은 배열 뷰로 잘라냄
+        offsets = None
+        if roi is not None:
+            crops, offsets = [], []
+            for image in images:
+                h, w = image.shape[:2]
+                x1, y1 = int(round(roi[0] * w)), int(round(roi[1] * h))
+                x2, y2 = max(x1 + 1, int(round(roi[2] * w))), max(y1 + 1, int(round(roi[3] * h)))
+                crops.append(image[y1:y2, x1:x2])
+                offsets.append((x1, y1))
+            images = crops
+        
+        if not self.shared_preprocess:
+            # 모델별 전처리는 3채널 입력만 받으므로 흑백 이미지는 여기서 채널 확장
+            images = [cv2.cvtColor(image, cv2.COLOR_GRAY2BGR) if image.ndim == 2 else image for image in images]
+            transforms = None
+            if offsets is not None:
+                transforms = [
+                    LetterboxTransform(1.0, 0, 0, image.shape[1], image.shape[0], *offset)
+                    for image, offset in zip(images, offsets)
+                ]
+            yield images, transforms
+            return
+        
+        # 축소/여백/정규화를 한 번만 해서 같은 설정의 모델에 같은 텐서 전달 (torch가 아니면 고정 크기 입력)
+        with self._stage('preprocess'):
+            tensor, transforms, key, buffers = self.preprocessor(
+                images, rect=self.backend == 'torch', imgsz=imgsz, offsets=offsets)
+        try:
+            yield tensor, transforms
+        finally:
+            self.preprocessor.release(key, buffers)
+    
+    def _run_model(self, model_name, images):
+        """단일 모델로 이미지 배치 추론 (같은 모델 인스턴스는 동시에 한 스레드만 사용)"""
+        # 공유 전처리 텐서는 이미 입력 크기에 맞춰져 있고, 이미지 목록이면 모델별 크기로 전처리
+        imgsz = self.model_inputs[model_name]['imgsz']
+        options = {'imgsz': imgsz} if imgsz and not self.shared_preprocess else {}
+        try:
+            with self._stage(model_name), self._model_locks[model_name]:
+                results = self.models[model_name](images, verbose=False, conf=self.conf_threshold, **options)
+        except Exception as e:
+            print(f"{self.model_labels[model_name]} 모델 처리 오류: {e}")
+            return None
+        
+        if self._stage_listeners:
+            self._record_model_speed(model_name, results)
+        return results
+    
+    def _infer_fused_batch(self, images, models=None, transforms=None):
+        """통합 모델 한 번으로 추론하고 이미지별 {모델 이름: Detections}로 나눠 반환"""
+        # 모델별 임계값 중 가장 낮은 값으로 추론한 뒤 클래스별 임계값으로 다시 거름
+        min_threshold = min(self.model_conf_thresholds.values())
+        try:
+            imgsz = self.model_inputs['fused']['imgsz']
+            options = {'imgsz': imgsz} if imgsz and not self.shared_preprocess else {}
+            with self._stage('fused'), self._fused_lock:
+                results = self.fused_model(images, verbose=False, conf=min_threshold, **options)
+        except Exception as e:
+            print(f"통합 모델 처리 오류: {e}")
+            results = [None] * len(images)
+        else:
+            if self._stage_listeners:
+                self._record_model_speed('fused', results)
+        
+        model_names = [name for name in self.model_paths if models is None or name in models]
+        return [
+            self._split_fused_result(result, model_names, transforms[index] if transforms else None)
+            for index, result in enumerate(results)
+        ]
+    
+    def _split_fused_result(self, result, model_names, transform=None):
+        """통합 모델 결과를 원래 모델별 Detections로 나눔 (클래스 ID도 원래 모델 기준으로 변환)"""
+        detections = Detections.from_results(
+            result, min(self.model_conf_thresholds.values()), 'fused', transform)
+        
+        fused_ids = detections.cls.tolist()
+        owners = np.array([self._fused_classes.get(cls_id, (None, -1))[0] for cls_id in fused_ids], dtype=object)
+        class_ids = np.array([self._fused_classes.get(cls_id, (None, -1))[1] for cls_id in fused_ids], dtype=int)
+        
+        split = {}
+        for model_name in model_names:
+            mask = (owners == model_name) & (detections.conf >= self.model_conf_thresholds[model_name])
+            split[model_name] = Detections(detections.xyxy[mask], detections.conf[mask], class_ids[mask], model_name)
+        return split
+    
+    def _postprocess(self, image, model_results):
+        """모델별 추론 결과를 하나의 감지 결과로 정리 - (감지 결과, 감지 기록, 경로 분석) 반환"""
+        with self._stage('postprocess'):
+            return self._postprocess_frame(image, model_results)
+    
+    def _postprocess_frame(self, image, model_results):
+        """프레임 하나의 결과 정리, 경로 분석, 네비게이션/화살표 정보 생성"""
         detected_classes = []
         detected_boxes = []
         
-        # 각 모델별 결과 저장
-        model_results = {}
+        processors = {
+            'block': self._process_block_results,      # 1. 블록 모델 (경로 분석)
+            'scooter': self._process_scooter_results,  # 2. 스쿠터 모델 (장애물 감지)
+            'button': self._process_button_results     # 3. 음향 신호기 모델
+        }
         
-        # 1. 블록 모델 (경로 분석)
-        if self.models['block']:
+        # 결과 텐서는 모델별로 한 번만 NumPy 배열로 변환
+        detections = {}
+        for model_name, processor in processors.items():
+            result = model_results.get(model_name)
+            if result is None:
+                continue
             try:
-                results_block = self.models['block'](image, verbose=False, conf=self.conf_threshold)
-                model_results['block'] = results_block[0]
-                block_classes, block_boxes = self._process_block_results(results_block[0])
-                detected_classes.extend(block_classes)
-                detected_boxes.extend(block_boxes)
+                if isinstance(result, Detections):
+                    # 추론 대신 넘겨받은 감지 기록
+                    detections[model_name] = result
+                else:
+                    detections[model_name] = Detections.from_results(
+                        result, self.model_conf_thresholds[model_name], model_name)
+                classes, boxes = processor(detections[model_name])
+                detected_classes.extend(classes)
+                detected_boxes.extend(boxes)
             except Exception as e:
-                print(f"블록 모델 처리 오류: {e}")
-                model_results['block'] = None
+                print(f"{self.model_labels[model_name]} 모델 처리 오류: {e}")
+                detections.pop(model_name, None)
         
-        # 2. 스쿠터 모델 (장애물 감지)
-        if self.models['scooter']:
-            try:
-                results_scooter = self.models['scooter'](image, verbose=False, conf=self.conf_threshold)
-                model_results['scooter'] = results_scooter[0]
-                scooter_classes, scooter_boxes = self._process_scooter_results(results_scooter[0])
-                detected_classes.extend(scooter_classes)
-                detected_boxes.extend(scooter_boxes)
-            except Exception as e:
-                print(f"스쿠터 모델 처리 오류: {e}")
-                model_results['scooter'] = None
-
-        # 3. 음향 신호기 모델
-        if self.models['button']:
-            try:
-                results_button = self.models['button'](image, verbose=False, conf=self.conf_threshold)
-                model_results['button'] = results_button[0]
-                button_classes, button_boxes = self._process_button_results(results_button[0])
-                detected_classes.extend(button_classes)
-                detected_boxes.extend(button_boxes)
-            except Exception as e:
-                print(f"음향 신호기 모델 처리 오류: {e}")
-                model_results['button'] = None
+        # 경로 분석은 프레임당 한 번만 수행
+        with self._stage('scene_analysis'):
+            scene = self._analyze_scene(image, detections)
         
         # 네비게이션 정보 생성
-        navigation_info = self._generate_navigation_info(model_results, detected_classes, detected_boxes)
+        with self._stage('navigation_info'):
+            navigation_info = self._generate_navigation_info(scene, detections)
         
         # 화살표 정보 생성
-        arrow_info = self._generate_arrow_info(image, model_results)
+        with self._stage('arrow_info'):
+            arrow_info = self._generate_arrow_info(scene)
         
         all_box_coords = [item['box'] for item in detected_boxes]
         
-        return all_box_coords, detected_classes, detected_boxes, navigation_info, arrow_info
+        output = (all_box_coords, detected_classes, detected_boxes, navigation_info, arrow_info)
+        return output, detections, scene
     
-    def _process_block_results(self, results):
+    def _to_box_records(self, detections, class_names):
+        """감지 기록을 API용 박스 딕셔너리 목록으로 변환"""
+        return [
+            {
+                'class': class_name,
+                'confidence': confidence,
+                'box': box,
+                'model': detections.model
+            }
+            for class_name, confidence, box in zip(class_names, detections.conf.tolist(), detections.xyxy.tolist())
+        ]
+    
+    def _process_block_results(self, detections):
         """블록 모델 결과 처리"""
-        classes = []
-        boxes = []
-        
-        if results and results.boxes is not None:
-            for box_data in results.boxes:
-                cls_id = int(box_data.cls[0])
-                confidence = float(box_data.conf[0])
-                box_coords = box_data.xyxy[0].cpu().numpy().astype(int)
-                
-                if confidence >= self.conf_threshold:
-                    # 클래스 ID에 따른 분류
-                    if cls_id == 0:  # Go_Forward
-                        class_name = 'Go_Forward'
-                    elif cls_id == 1:  # Stop
-                        class_name = 'Stop'
-                    else:
-                        class_name = f'Block_Class_{cls_id}'
-                    
-                    classes.append(class_name)
-                    boxes.append({
-                        'class': class_name,
-                        'confidence': confidence,
-                        'box': box_coords.tolist(),
-                        'model': 'block'
-                    })
-        
-        return classes, boxes
-    
-    def _process_scooter_results(self, results):
+        # 클래스 ID에 따른 분류
+        classes = [BLOCK_CLASS_NAMES.get(cls_id, f'Block_Class_{cls_id}') for cls_id in detections.cls.tolist()]
+        return classes, self._to_box_records(detections, classes)
+    
+    def _process_scooter_results(self, detections):
         """스쿠터 모델 결과 처리"""
-        classes = []
-        boxes = []
-        
-        if results and results.boxes is not None:
-            for box_data in results.boxes:
-                confidence = float(box_data.conf[0])
-                box_coords = box_data.xyxy[0].cpu().numpy().astype(int)
-                
-                if confidence >= 0.5: #스쿠터 모델만 임계값 낮게(인식 잘 안됨)
-                    classes.append('Scooter')
-                    boxes.append({
-                        'class': 'Scooter',
-                        'confidence': confidence,
-                        'box': box_coords.tolist(),
-                        'model': 'scooter'
-                    })
-        
-        return classes, boxes
-    
-    def _process_button_results(self, results):
+        classes = ['Scooter'] * len(detections)
+        return classes, self._to_box_records(detections, classes)
+    
+    def _process_button_results(self, detections):
         """음향 신호기 모델 결과 처리"""
-        classes = []
-        boxes = []
-        
-        if results and results.boxes is not None:
-            for box_data in results.boxes:
-                confidence = float(box_data.conf[0])
-                box_coords = box_data.xyxy[0].cpu().numpy().astype(int)
-                
-                if confidence >= self.conf_threshold:
-                    classes.append('Sound_Button')
-                    boxes.append({
-                        'class': 'Sound_Button',
-                        'confidence': confidence,
-                        'box': box_coords.tolist(),
-                        'model': 'button'
-                    })
-        
-        return classes, boxes
-    
-    def _draw_results(self, image, model_results):
-        """결과 이미지에 바운딩 박스와 화살표 그리기"""
-        result_img = image.copy()
-        h, w, _ = image.shape
+        classes = ['Sound_Button'] * len(detections)
+        return classes, self._to_box_records(detections, classes)
+    
+    def _split_block_boxes(self, block_detections):
+        """블록 감지를 Stop 박스와 Go_Forward 박스로 분리"""
+        stop_mask = block_detections.cls == 1
+        return block_detections.xyxy[stop_mask], block_detections.xyxy[~stop_mask]
+    
+    def _analyze_scene(self, image, detections):
+        """블록 감지로 교차로/직진 경로 기하 정보를 한 번 계산"""
+        h, w = image.shape[:2]
         arrow_length = int(np.sqrt(h**2 + w**2) * 0.15)
+        
+        block_detections = detections.get('block') or Detections.empty('block')
+        initial_stop_boxes, go_boxes = self._split_block_boxes(block_detections)
+        
+        # 겹치는 박스 병합
+        stop_boxes = self._merge_close_boxes(initial_stop_boxes)
+        
+        intersection_arrows = []
+        path_starts = path_ends = np.empty((0, 2), dtype=int)
+        if len(stop_boxes) and len(go_boxes):
+            # 교차로 상황 - 방향 클러스터링
+            intersection_arrows = self._find_intersection_arrows(stop_boxes, go_boxes, arrow_length)
+        elif len(go_boxes):
+            # 직진 상황
+            path_starts, path_ends = self._find_straight_path(go_boxes)
+        
+        return SceneAnalysis(stop_boxes, go_boxes, bool((block_detections.cls == 0).any()),
+                             intersection_arrows, path_starts, path_ends)
+    
+    def _draw_results(self, image, detections, scene=None):
+        """결과 이미지에 바운딩 박스와 화살표 그리기"""
+        result_img = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR) if image.ndim == 2 else image.copy()
+        w = image.shape[1]
         arrow_thickness = max(2, int(w / 120))
         
         # 블록 모델 결과로 경로 화살표 그리기
-        if model_results.get('block'):
-            result_img = self._draw_navigation_arrows(result_img, model_results['block'], arrow_length, arrow_thickness)
+        if scene is None:
+            scene = self._analyze_scene(image, detections)
+        result_img = self._draw_navigation_arrows(result_img, scene, arrow_thickness)
         
         # 각 모델별 바운딩 박스 그리기
         colors = {
@@ -178,93 +640,41 @@ class BlindNavigationModel:
             'button': (0, 255, 200)    # 연두색 (음향 신호기)
         }
         
+        # 라벨 텍스트
+        label_map = {
+            'scooter': 'Scooter',
+            'button': 'Sound Button'
+        }
+        
         for model_name, color in colors.items():
-            if model_results.get(model_name) and model_results[model_name].boxes is not None:
-                for box_data in model_results[model_name].boxes:
-                    confidence = float(box_data.conf[0])
-                    if confidence >= self.conf_threshold:
-                        x1, y1, x2, y2 = box_data.xyxy[0].cpu().numpy().astype(int)
-                        cv2.rectangle(result_img, (x1, y1), (x2, y2), color, arrow_thickness)
-                        
-                        # 라벨 텍스트
-                        label_map = {
-                            'scooter': 'Scooter',
-                            'button': 'Sound Button'
-                        }
-                        label = f"{label_map[model_name]}: {confidence:.2f}"
-                        cv2.putText(result_img, label, (x1, y1 - 10), 
-                                  cv2.FONT_HERSHEY_SIMPLEX, 0.8, color, 2)
+            if not detections.get(model_name):
+                continue
+            for (x1, y1, x2, y2), confidence in zip(detections[model_name].xyxy.tolist(),
+                                                    detections[model_name].conf.tolist()):
+                cv2.rectangle(result_img, (x1, y1), (x2, y2), color, arrow_thickness)
+                label = f"{label_map[model_name]}: {confidence:.2f}"
+                cv2.putText(result_img, label, (x1, y1 - 10), 
+                          cv2.FONT_HERSHEY_SIMPLEX, 0.8, color, 2)
         
         return result_img
     
-    def _draw_navigation_arrows(self, image, block_results, arrow_length, arrow_thickness):
-        """블록 모델 결과를 기반으로 네비게이션 화살표 그리기"""
-        if not block_results.boxes:
-            return image
-        
-        # 기존 main.py의 경로 분석 로직 적용
-        initial_stop_boxes, go_boxes = [], []
-        
-        for box_data in block_results.boxes:
-            cls_id = int(box_data.cls[0])
-            confidence = float(box_data.conf[0])
-            box = box_data.xyxy[0].cpu().numpy().astype(int)
-            
-            if confidence >= self.conf_threshold:
-                if cls_id == 1:  # Stop
-                    initial_stop_boxes.append(box)
-                else:  # Go_Forward
-                    go_boxes.append(box)
-        
-        # 겹치는 박스 병합
-        stop_boxes = self._merge_close_boxes(initial_stop_boxes)
-        
-        # 경로 분석 및 화살표 그리기
-        if stop_boxes and go_boxes:
+    def _draw_navigation_arrows(self, image, scene, arrow_thickness):
+        """경로 분석 결과를 기반으로 네비게이션 화살표 그리기"""
+        if scene.layout == 'intersection':
             # 교차로 상황
-            for stop_box in stop_boxes:
-                stop_center = self._get_box_center(stop_box)
-                proximity_threshold = (stop_box[2] - stop_box[0]) * 3.0
-                
-                candidate_vectors = []
-                for go_box in go_boxes:
-                    go_center = self._get_box_center(go_box)
-                    vec = go_center - stop_center
-                    if 0 < np.linalg.norm(vec) < proximity_threshold:
-                        candidate_vectors.append(vec)
-                
-                if candidate_vectors:
-                    # 방향 클러스터링 및 화살표 그리기
-                    clustered_directions = self._cluster_directions(candidate_vectors)
-                    for vec in clustered_directions:
-                        norm_vec = vec / (np.linalg.norm(vec) + 1e-6)
-                        endpoint = stop_center + (norm_vec * arrow_length)
-                        cv2.arrowedLine(image, tuple(stop_center.astype(int)), 
-                                      tuple(endpoint.astype(int)), (255, 255, 0), arrow_thickness, tipLength=0.25)
+            for stop_center, endpoint in scene.intersection_arrows:
+                cv2.arrowedLine(image, tuple(stop_center.astype(int)), 
+                              tuple(endpoint.astype(int)), (255, 255, 0), arrow_thickness, tipLength=0.25)
             
             cv2.putText(image, "State: Intersection", (20, 40), 
                        cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 255, 0), 2)
         
-        elif go_boxes:
+        elif scene.layout == 'straight':
             # 직진 상황
-            all_path_points = []
-            for box in go_boxes:
-                x1, y1, x2, y2 = box
-                step = (y2 - y1) // 4
-                if step > 0:
-                    for i in range(4):
-                        all_path_points.append(np.array([(x1+x2)//2, y1+i*step+step//2]))
-                else:
-                    all_path_points.append(self._get_box_center(box))
-            
-            if len(all_path_points) >= 2:
-                all_path_points.sort(key=lambda pt: pt[1], reverse=True)
-                for i in range(len(all_path_points) - 1):
-                    pt1, pt2 = all_path_points[i], all_path_points[i+1]
-                    if pt1[1] > pt2[1]:
-                        cv2.arrowedLine(image, tuple(pt1.astype(int)), 
-                                      tuple(pt2.astype(int)), (255, 0, 0), 
-                                      max(1, arrow_thickness - 1), tipLength=0.3)
+            for pt1, pt2 in zip(scene.path_starts, scene.path_ends):
+                cv2.arrowedLine(image, tuple(pt1.astype(int)), 
+                              tuple(pt2.astype(int)), (255, 0, 0), 
+                              max(1, arrow_thickness - 1), tipLength=0.3)
             
             cv2.putText(image, "State: Straight", (20, 40), 
                        cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 255, 255), 2)
@@ -272,85 +682,124 @@ class BlindNavigationModel:
         return image
     
     def _merge_close_boxes(self, boxes, iou_threshold=0.7):
-        """겹치는 박스들을 병합"""
-        if not boxes:
-            return []
-        
-        boxes = sorted(boxes, key=lambda b: (b[2]-b[0])*(b[3]-b[1]), reverse=True)
-        merged = []
-        remaining = list(boxes)
-        
-        while remaining:
-            base = remaining.pop(0)
-            temp = []
-            
-            for other in remaining:
-                # IoU 계산
-                xA = max(base[0], other[0])
-                yA = max(base[1], other[1])
-                xB = min(base[2], other[2])
-                yB = min(base[3], other[3])
-                
-                inter_area = max(0, xB - xA) * max(0, yB - yA)
-                
-                if inter_area > 0:
-                    base_area = (base[2]-base[0])*(base[3]-base[1])
-                    other_area = (other[2]-other[0])*(other[3]-other[1])
-                    iou = inter_area / float(base_area + other_area - inter_area)
-                    
-                    if iou < iou_threshold:
-                        temp.append(other)
-                else:
-                    temp.append(other)
-            
-            merged.append(base)
-            remaining = temp
-        
-        return merged
+        """겹치는 박스들을 병합 (넓은 박스 우선, 쌍별 IoU 행렬 사용)"""
+        boxes = np.asarray(boxes, dtype=int).reshape(-1, 4)
+        if len(boxes) == 0:
+            return boxes
+        
+        # 넓이 내림차순 정렬 (같은 넓이는 입력 순서 유지)
+        areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+        order = np.argsort(-areas, kind='stable')
+        boxes, areas = boxes[order], areas[order]
+        
+        # 쌍별 교집합 넓이와 IoU 행렬
+        xA = np.maximum(boxes[:, None, 0], boxes[None, :, 0])
+        yA = np.maximum(boxes[:, None, 1], boxes[None, :, 1])
+        xB = np.minimum(boxes[:, None, 2], boxes[None, :, 2])
+        yB = np.minimum(boxes[:, None, 3], boxes[None, :, 3])
+        inter_area = np.maximum(0, xB - xA) * np.maximum(0, yB - yA)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            iou = inter_area / (areas[:, None] + areas[None, :] - inter_area).astype(float)
+        overlaps = (inter_area > 0) & (iou >= iou_threshold)
+        
+        # 남은 박스 중 가장 넓은 박스가 자신과 많이 겹치는 뒤쪽 박스들을 흡수
+        keep = np.ones(len(boxes), dtype=bool)
+        for i in range(len(boxes)):
+            if keep[i]:
+                keep[i + 1:] &= ~overlaps[i, i + 1:]
+        
+        return boxes[keep]
     
     def _get_box_center(self, box):
         """박스의 중심점 계산"""
         return np.array([(box[0] + box[2]) // 2, (box[1] + box[3]) // 2])
     
+    def _get_box_centers(self, boxes):
+        """(N, 4) 박스 배열의 중심점 배열 계산"""
+        return (boxes[:, :2] + boxes[:, 2:]) // 2
+    
+    def _find_intersection_arrows(self, stop_boxes, go_boxes, arrow_length):
+        """Stop 박스마다 근처 Go_Forward 방향을 묶어 (시작점, 끝점) 화살표 목록 계산"""
+        stop_centers = self._get_box_centers(stop_boxes)
+        go_centers = self._get_box_centers(go_boxes)
+        
+        # (Stop 수, Go 수, 2) 벡터와 근접 마스크
+        vectors = go_centers[None, :, :] - stop_centers[:, None, :]
+        distances = np.sqrt((vectors ** 2).sum(axis=2))
+        proximity_thresholds = (stop_boxes[:, 2] - stop_boxes[:, 0]) * 3.0
+        near = (distances > 0) & (distances < proximity_thresholds[:, None])
+        
+        arrows = []
+        for stop_center, candidate_vectors, mask in zip(stop_centers, vectors, near):
+            if not mask.any():
+                continue
+            clustered_directions = self._cluster_directions(candidate_vectors[mask])
+            norms = np.linalg.norm(clustered_directions, axis=1, keepdims=True)
+            endpoints = stop_center + (clustered_directions / (norms + 1e-6) * arrow_length)
+            arrows.extend((stop_center, endpoint) for endpoint in endpoints)
+        
+        return arrows
+    
+    def _find_straight_path(self, go_boxes):
+        """Go_Forward 박스를 따라 아래에서 위로 이어지는 경로 선분 (시작점 배열, 끝점 배열) 계산"""
+        x1, y1, x2, y2 = go_boxes.T
+        step = (y2 - y1) // 4
+        
+        # 높이가 충분한 박스는 세로 4개 지점, 아니면 중심점 하나
+        counts = np.where(step > 0, 4, 1)
+        box_index = np.repeat(np.arange(len(go_boxes)), counts)
+        point_index = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        step = step[box_index]
+        xs = (x1 + x2)[box_index] // 2
+        ys = np.where(step > 0,
+                      y1[box_index] + point_index * step + step // 2,
+                      (y1 + y2)[box_index] // 2)
+        
+        if len(xs) < 2:
+            return np.empty((0, 2), dtype=int), np.empty((0, 2), dtype=int)
+        
+        # 아래(큰 y)에서 위로 정렬 후 위로 올라가는 구간만 사용
+        order = np.argsort(-ys, kind='stable')
+        path_points = np.stack([xs[order], ys[order]], axis=1)
+        starts, ends = path_points[:-1], path_points[1:]
+        rising = starts[:, 1] > ends[:, 1]
+        return starts[rising], ends[rising]
+    
     def _cluster_directions(self, vectors, angle_threshold=45):
-        """방향 벡터들을 클러스터링"""
-        if not vectors:
-            return []
-        
-        unique_groups = []
-        for vec in vectors:
-            is_new_group = True
-            for group in unique_groups:
-                angle = self._get_angle_between(vec, group[0])
-                if angle < angle_threshold:
-                    group.append(vec)
-                    is_new_group = False
-                    break
-            
-            if is_new_group:
-                unique_groups.append([vec])
+        """방향 벡터들을 클러스터링 (각 그룹의 첫 벡터와의 각도 기준)"""
+        vectors = np.asarray(vectors).reshape(-1, 2)
+        if len(vectors) == 0:
+            return np.empty((0, 2))
+        
+        angles = self._get_angles_between(vectors, vectors)
+        
+        # 각 벡터를 각도가 임계값보다 작은 첫 번째 그룹에 배정
+        labels = np.empty(len(vectors), dtype=int)
+        leaders = []
+        for i in range(len(vectors)):
+            matches = np.flatnonzero(angles[i, leaders] < angle_threshold)
+            if len(matches):
+                labels[i] = matches[0]
+            else:
+                labels[i] = len(leaders)
+                leaders.append(i)
         
         # 각 그룹의 평균 방향 계산
-        clustered_directions = []
-        for group in unique_groups:
-            if group:
-                avg_direction = np.mean(group, axis=0)
-                clustered_directions.append(avg_direction)
-        
-        return clustered_directions
-    
-    def _get_angle_between(self, v1, v2):
-        """두 벡터 사이의 각도 계산"""
-        norm_v1 = np.linalg.norm(v1)
-        norm_v2 = np.linalg.norm(v2)
-        if norm_v1 == 0 or norm_v2 == 0:
-            return 180.0
-        
-        dot_product = np.dot(v1, v2)
-        cos_angle = dot_product / (norm_v1 * norm_v2)
-        return np.degrees(np.arccos(np.clip(cos_angle, -1.0, 1.0)))
-    
-    def _generate_arrow_info(self, image, model_results):
+        return np.array([np.mean(vectors[labels == group], axis=0) for group in range(len(leaders))])
+    
+    def _get_angles_between(self, vectors_a, vectors_b):
+        """두 벡터 집합 사이의 쌍별 각도 행렬 계산"""
+        norms_a = np.linalg.norm(vectors_a, axis=1)
+        norms_b = np.linalg.norm(vectors_b, axis=1)
+        
+        dot_products = vectors_a @ vectors_b.T
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cos_angles = dot_products / (norms_a[:, None] * norms_b[None, :])
+        angles = np.degrees(np.arccos(np.clip(cos_angles, -1.0, 1.0)))
+        angles[(norms_a == 0)[:, None] | (norms_b == 0)[None, :]] = 180.0
+        return angles
+    
+    def _generate_arrow_info(self, scene):
         """화살표 정보 생성 - 클라이언트에서 렌더링하기 위한 데이터"""
         arrow_info = {
             'arrows': [],
@@ -358,90 +807,35 @@ class BlindNavigationModel:
             'state_color': '#FFFF00'
         }
         
-        if not model_results.get('block') or not model_results['block'].boxes:
-            return arrow_info
-        
-        h, w, _ = image.shape
-        arrow_length = int(np.sqrt(h**2 + w**2) * 0.15)
-        
-        # 블록 모델 결과 분석
-        initial_stop_boxes, go_boxes = [], []
-        
-        for box_data in model_results['block'].boxes:
-            cls_id = int(box_data.cls[0])
-            confidence = float(box_data.conf[0])
-            box = box_data.xyxy[0].cpu().numpy().astype(int)
-            
-            if confidence >= self.conf_threshold:
-                if cls_id == 1:  # Stop
-                    initial_stop_boxes.append(box)
-                else:  # Go_Forward
-                    go_boxes.append(box)
-        
-        # 겹치는 박스 병합
-        stop_boxes = self._merge_close_boxes(initial_stop_boxes)
-        
-        # 경로 분석 및 화살표 정보 생성
-        if stop_boxes and go_boxes:
+        if scene.layout == 'intersection':
             # 교차로 상황
             arrow_info['state_text'] = 'Intersection'
             arrow_info['state_color'] = '#00FF00'
             
-            for stop_box in stop_boxes:
-                stop_center = self._get_box_center(stop_box)
-                proximity_threshold = (stop_box[2] - stop_box[0]) * 3.0
-                
-                candidate_vectors = []
-                for go_box in go_boxes:
-                    go_center = self._get_box_center(go_box)
-                    vec = go_center - stop_center
-                    if 0 < np.linalg.norm(vec) < proximity_threshold:
-                        candidate_vectors.append(vec)
-                
-                if candidate_vectors:
-                    # 방향 클러스터링 및 화살표 정보 생성
-                    clustered_directions = self._cluster_directions(candidate_vectors)
-                    for vec in clustered_directions:
-                        norm_vec = vec / (np.linalg.norm(vec) + 1e-6)
-                        endpoint = stop_center + (norm_vec * arrow_length)
-                        
-                        arrow_info['arrows'].append({
-                            'type': 'intersection',
-                            'start': [int(stop_center[0]), int(stop_center[1])],
-                            'end': [int(endpoint[0]), int(endpoint[1])],
-                            'color': '#FFFF00'
-                        })
-        
-        elif go_boxes:
+            for stop_center, endpoint in scene.intersection_arrows:
+                arrow_info['arrows'].append({
+                    'type': 'intersection',
+                    'start': [int(stop_center[0]), int(stop_center[1])],
+                    'end': [int(endpoint[0]), int(endpoint[1])],
+                    'color': '#FFFF00'
+                })
+        
+        elif scene.layout == 'straight':
             # 직진 상황
             arrow_info['state_text'] = 'Straight'
             arrow_info['state_color'] = '#00FFFF'
             
-            all_path_points = []
-            for box in go_boxes:
-                x1, y1, x2, y2 = box
-                step = (y2 - y1) // 4
-                if step > 0:
-                    for i in range(4):
-                        all_path_points.append(np.array([(x1+x2)//2, y1+i*step+step//2]))
-                else:
-                    all_path_points.append(self._get_box_center(box))
-            
-            if len(all_path_points) >= 2:
-                all_path_points.sort(key=lambda pt: pt[1], reverse=True)
-                for i in range(len(all_path_points) - 1):
-                    pt1, pt2 = all_path_points[i], all_path_points[i+1]
-                    if pt1[1] > pt2[1]:
-                        arrow_info['arrows'].append({
-                            'type': 'straight',
-                            'start': [int(pt1[0]), int(pt1[1])],
-                            'end': [int(pt2[0]), int(pt2[1])],
-                            'color': '#FF0000'
-                        })
+            for pt1, pt2 in zip(scene.path_starts.tolist(), scene.path_ends.tolist()):
+                arrow_info['arrows'].append({
+                    'type': 'straight',
+                    'start': pt1,
+                    'end': pt2,
+                    'color': '#FF0000'
+                })
         
         return arrow_info
 
-    def _generate_navigation_info(self, model_results, detected_classes, detected_boxes):
+    def _generate_navigation_info(self, scene, detections):
         """네비게이션 정보 생성"""
         navigation_info = {
             'state': 'unknown',
@@ -454,10 +848,10 @@ class BlindNavigationModel:
         }
         
         # 상태 결정
-        if 'Stop' in detected_classes:
+        if len(scene.stop_boxes):
             navigation_info['state'] = 'intersection'
             navigation_info['direction'] = 'stop'
-        elif 'Go_Forward' in detected_classes:
+        elif scene.has_forward:
             navigation_info['state'] = 'straight'
             navigation_info['direction'] = 'forward'
         else:
@@ -465,12 +859,12 @@ class BlindNavigationModel:
             navigation_info['direction'] = 'none'
         
         # 경고 사항
-        if 'Scooter' in detected_classes:
+        if detections.get('scooter'):
             navigation_info['warnings'].append('장애물이 감지되었습니다')
             navigation_info['obstacles'].append('scooter')
         
         # 신호 정보
-        if 'Sound_Button' in detected_classes:
+        if detections.get('button'):
             navigation_info['signals']['sound_button'] = True
         
         # 복합 상황 처리
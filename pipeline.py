@@ -0,0 +1,130 @@
+import queue
+import threading
+
+
+class FramePipeline:
+    def __init__(self, process, emit, max_workers=4):
+        """세션별 최신 프레임만 유지하는 프레임 처리 파이프라인 (대기 슬롯 → 워커 풀 → 전송)
+
+        process(sid, payload)는 응답 데이터를 반환하고, emit(event, data, sid)로 클라이언트에 보낸다.
+        응답이 없거나(None) 예외가 나면 'frame_error' 이벤트를 보낸다.
+        """
+        self.process = process
+        self.emit = emit
+        self.max_workers = max_workers
+
+        self._lock = threading.Lock()
+        self._pending = {}        # 세션별 가장 최근 대기 프레임 (새 프레임이 오면 덮어씀)
+        self._scheduled = set()   # 대기열에 있거나 처리 중인 세션
+        self._ready = queue.Queue()  # 세션당 최대 한 번만 들어가므로 세션 수로 제한됨
+
+        # 통계
+        self.processed = 0
+        self.dropped = 0
+
+        self._workers = []
+        for index in range(max_workers):
+            worker = threading.Thread(target=self._worker_loop, name=f'frame-worker-{index}', daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def submit(self, sid, payload):
+        """세션 프레임 등록 - 아직 처리되지 않은 이전 프레임은 버림"""
+        with self._lock:
+            replaced = sid in self._pending
+            self._pending[sid] = payload
+            if replaced:
+                self.dropped += 1
+
+            schedule = sid not in self._scheduled
+            if schedule:
+                self._scheduled.add(sid)
+            depth = self._ready.qsize()
+
+        if schedule:
+            self._ready.put(sid)
+
+        # 프레임이 버려졌거나 워커보다 대기 세션이 많으면 클라이언트에 혼잡 알림
+        if replaced or depth >= self.max_workers:
+            self.emit('backpressure', {'dropped': replaced, 'queue_depth': depth}, sid)
+
+    def remove(self, sid):
+        """연결이 끊긴 세션의 대기 프레임 제거"""
+        with self._lock:
+            self._pending.pop(sid, None)
+
+    def queue_depth(self):
+        """처리를 기다리는 세션 수"""
+        return self._ready.qsize()
+
+    def stop(self):
+        """워커 종료"""
+        for _ in self._workers:
+            self._ready.put(None)
+        for worker in self._workers:
+            worker.join()
+
+    def _worker_loop(self):
+        """대기열에서 세션을 꺼내 최신 프레임 하나를 처리"""
+        while True:
+            sid = self._ready.get()
+            if sid is None:
+                break
+
+            with self._lock:
+                payload = self._pending.pop(sid, None)
+
+            if payload is not None:
+                error = 'invalid frame'
+                try:
+                    response = self.process(sid, payload)
+                except Exception as e:
+                    print(f"프레임 처리 오류 ({sid}): {e}")
+                    response, error = None, str(e)
+
+                if response is not None:
+                    self.emit('result', response, sid)
+                else:
+                    # 결과가 없어도 알려야 클라이언트가 응답 대기를 풀고 다음 프레임을 보냄
+                    self.emit('frame_error', {'error': error}, sid)
+
+                with self._lock:
+                    self.processed += 1
+
+            # 처리 중에 새 프레임이 도착했다면 다시 대기열로
+            with self._lock:
+                requeue = sid in self._pending
+                if not requeue:
+                    self._scheduled.discard(sid)
+
+            if requeue:
+                self._ready.put(sid)
+
+
+class CapturePolicy:
+    def __init__(self, max_workers, widths=(640, 480, 320), min_interval=200, max_interval=2000, smoothing=0.2):
+        """처리 시간과 대기열 길이로 클라이언트 캡처 간격/해상도를 정하는 정책"""
+        self.max_workers = max_workers
+        self.widths = widths            # 부하 단계별 최대 캡처 너비 (YOLO 입력 크기 이하)
+        self.min_interval = min_interval  # ms
+        self.max_interval = max_interval  # ms
+        self.smoothing = smoothing
+        self.avg_process_time = None    # 처리 시간 지수 이동 평균 (초)
+        self._lock = threading.Lock()
+
+    def update(self, process_time, queue_depth):
+        """새 측정값을 반영하고 클라이언트에 보낼 캡처 설정 반환"""
+        with self._lock:
+            if self.avg_process_time is None:
+                self.avg_process_time = process_time
+            else:
+                self.avg_process_time += self.smoothing * (process_time - self.avg_process_time)
+            avg_process_time = self.avg_process_time
+
+        # 대기 세션이 워커 수를 넘을수록 간격을 늘리고 해상도를 낮춤
+        load = queue_depth / self.max_workers
+        interval = avg_process_time * 1000 * (1 + load)
+        interval = int(min(self.max_interval, max(self.min_interval, interval)))
+        level = min(len(self.widths) - 1, int(load))
+
+        return {'max_width': self.widths[level], 'interval': interval}
@@ -0,0 +1,133 @@
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+import torch
+
+
+class LetterboxTransform:
+    """원본 이미지 -> 모델 입력 좌표 변환 정보 (박스를 원본 좌표로 되돌릴 때 사용)"""
+    __slots__ = ('gain', 'pad_x', 'pad_y', 'width', 'height', 'offset_x', 'offset_y')
+
+    def __init__(self, gain, pad_x, pad_y, width, height, offset_x=0, offset_y=0):
+        self.gain = gain          # 축소/확대 비율
+        self.pad_x = pad_x        # 왼쪽 여백
+        self.pad_y = pad_y        # 위쪽 여백
+        self.width = width        # 원본(ROI) 너비
+        self.height = height      # 원본(ROI) 높이
+        self.offset_x = offset_x  # 전체 프레임에서 ROI 왼쪽 위치
+        self.offset_y = offset_y  # 전체 프레임에서 ROI 위쪽 위치
+
+    def to_original(self, xyxy):
+        """모델 입력 좌표 (N,4) 박스를 전체 프레임 좌표로 변환 (ultralytics scale_boxes와 같은 계산 + ROI 위치)"""
+        xyxy = np.array(xyxy, dtype=np.float32).reshape(-1, 4)
+        xyxy[:, [0, 2]] -= self.pad_x
+        xyxy[:, [1, 3]] -= self.pad_y
+        xyxy /= self.gain
+        xyxy[:, [0, 2]] = xyxy[:, [0, 2]].clip(0, self.width)
+        xyxy[:, [1, 3]] = xyxy[:, [1, 3]].clip(0, self.height)
+        if self.offset_x or self.offset_y:
+            xyxy[:, [0, 2]] += self.offset_x
+            xyxy[:, [1, 3]] += self.offset_y
+        return xyxy
+
+
+class LetterboxPreprocessor:
+    def __init__(self, imgsz=640, stride=32, pad_value=114, max_cached_bytes=256 * 1024 * 1024):
+        """여러 모델이 함께 쓰는 입력 텐서를 프레임당 한 번만 만드는 전처리기
+
+        - ultralytics와 같은 방식으로 축소 + 여백(letterbox), BGR -> RGB, 0~1 정규화
+        - 입력 크기별 uint8/float32 버퍼를 재사용 (동시에 쓰이는 버퍼는 따로 할당)
+        - 반납된 버퍼는 크기별로 한 벌만 보관하고, 합계가 max_cached_bytes를 넘으면 가장 오래 안 쓴 것부터 버림
+        """
+        self.imgsz = imgsz
+        self.stride = stride
+        self.pad_value = pad_value
+        self.max_cached_bytes = max_cached_bytes
+        self._free_buffers = OrderedDict()  # (배치 크기, 높이, 너비) -> 재사용 가능한 (uint8, float32) 버퍼 (LRU 순서)
+        self._cached_bytes = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, images, rect=True, imgsz=None, offsets=None):
+        """이미지 목록 -> (BCHW 텐서, 이미지별 LetterboxTransform, 버퍼 키, 버퍼)
+
+        rect=True이면 같은 크기의 이미지는 stride 배수의 최소 직사각형으로, 아니면 imgsz 정사각형으로 맞춤
+        offsets: 이미지가 ROI 잘라내기일 때 전체 프레임에서의 (x, y) 위치 목록
+        사용이 끝난 버퍼는 release()로 반납
+        """
+        imgsz = imgsz or self.imgsz
+        same_shape = len({image.shape[:2] for image in images}) == 1
+        if rect and same_shape:
+            h, w = images[0].shape[:2]
+            gain = min(imgsz / h, imgsz / w)
+            unpad_w, unpad_h = int(round(w * gain)), int(round(h * gain))
+            input_h = int(np.ceil(unpad_h / self.stride) * self.stride)
+            input_w = int(np.ceil(unpad_w / self.stride) * self.stride)
+        else:
+            input_h = input_w = imgsz
+
+        key = (len(images), input_h, input_w)
+        buffers = self._acquire(key)
+        pixels, tensor_buffer = buffers
+
+        transforms = []
+        for index, image in enumerate(images):
+            offset = offsets[index] if offsets else (0, 0)
+            transforms.append(self._letterbox_into(image, pixels[index], imgsz, offset))
+
+        # BGR -> RGB, HWC -> CHW, 0~255 -> 0~1을 재사용 버퍼에 한 번에 기록
+        np.multiply(pixels[..., ::-1].transpose(0, 3, 1, 2), np.float32(1 / 255), out=tensor_buffer)
+        return torch.from_numpy(tensor_buffer), transforms, key, buffers
+
+    def release(self, key, buffers):
+        """다 쓴 버퍼를 다음 프레임에서 다시 쓰도록 반납"""
+        size = sum(buffer.nbytes for buffer in buffers)
+        with self._lock:
+            if key in self._free_buffers or size > self.max_cached_bytes:
+                # 같은 크기의 버퍼를 이미 보관 중이면 (동시 사용으로 생긴 여분) 버림
+                return
+            self._free_buffers[key] = buffers
+            self._cached_bytes += size
+            while self._cached_bytes > self.max_cached_bytes:
+                _, evicted = self._free_buffers.popitem(last=False)
+                self._cached_bytes -= sum(buffer.nbytes for buffer in evicted)
+
+    def _acquire(self, key):
+        with self._lock:
+            buffers = self._free_buffers.pop(key, None)
+            if buffers is not None:
+                self._cached_bytes -= sum(buffer.nbytes for buffer in buffers)
+                return buffers
+        batch, input_h, input_w = key
+        return (np.full((batch, input_h, input_w, 3), self.pad_value, dtype=np.uint8),
+                np.empty((batch, 3, input_h, input_w), dtype=np.float32))
+
+    def _letterbox_into(self, image, target, imgsz, offset):
+        """이미지 하나를 비율 유지로 축소해 target 가운데에 쓰고 여백을 채움 (흑백 이미지는 3채널로 복제)"""
+        h, w = image.shape[:2]
+        input_h, input_w = target.shape[:2]
+        gain = min(imgsz / h, imgsz / w)
+        unpad_w, unpad_h = int(round(w * gain)), int(round(h * gain))
+
+        dw, dh = (input_w - unpad_w) / 2, (input_h - unpad_h) / 2
+        top, left = int(round(dh - 0.1)), int(round(dw - 0.1))
+
+        if (w, h) != (unpad_w, unpad_h):
+            image = cv2.resize(image, (unpad_w, unpad_h), interpolation=cv2.INTER_LINEAR)
+
+        # 여백은 매번 다시 채움 (버퍼를 다른 크기의 이미지가 썼을 수 있음)
+        target[:top] = self.pad_value
+        target[top + unpad_h:] = self.pad_value
+        target[top:top + unpad_h, :left] = self.pad_value
+        target[top:top + unpad_h, left + unpad_w:] = self.pad_value
+        if image.ndim == 2:
+            target[top:top + unpad_h, left:left + unpad_w] = image[..., None]
+        else:
+            target[top:top + unpad_h, left:left + unpad_w] = image
+
+        # 원본 좌표 복원용 (ultralytics scale_boxes처럼 입력/원본 크기로 다시 계산)
+        gain = min(input_h / h, input_w / w)
+        pad_x = round((input_w - w * gain) / 2 - 0.1)
+        pad_y = round((input_h - h * gain) / 2 - 0.1)
+        return LetterboxTransform(gain, pad_x, pad_y, w, h, *offset)
@@ -0,0 +1,93 @@
+import cv2
+
+from model import Detections
+
+
+class ModelScheduler:
+    def __init__(self, model_names, scooter_every=3, motion_threshold=6.0, button_on_stop=True, button_hold=10,
+                 thumbnail_size=(64, 36)):
+        """프레임마다 실행할 모델을 고르는 스케줄러 (연속 프레임을 받는 세션/스트림 하나당 하나)
+
+        - scooter: scooter_every 프레임마다, 또는 직전 프레임 대비 움직임이 motion_threshold 이상일 때 실행
+          (건너뛴 프레임은 마지막 스쿠터 감지 결과를 그대로 사용)
+        - button: button_on_stop이면 Stop 블록이 보인 뒤 button_hold 프레임 동안만 실행
+        - block: 항상 실행 (추적기로 건너뛰는 것은 SessionTracker가 담당)
+        """
+        self.model_names = list(model_names)
+        self.scooter_every = scooter_every
+        self.motion_threshold = motion_threshold  # 축소 흑백 프레임 평균 밝기 차이 (0~255, 0이면 끔)
+        self.button_on_stop = button_on_stop
+        self.button_hold = button_hold
+        self.thumbnail_size = thumbnail_size
+
+        self.stats = {
+            'frames': 0,
+            'invocations': {name: 0 for name in self.model_names},
+            'skipped': {name: 0 for name in self.model_names}
+        }
+
+        self._frames_since_scooter = None
+        self._frames_since_stop = None
+        self._scooter_detections = None
+        self._previous_thumbnail = None
+
+    def plan(self, image):
+        """이번 프레임에 실행할 모델 목록과 건너뛴 모델 대신 넘길 감지 결과 반환"""
+        thumbnail = self._thumbnail(image)
+        moved = self._moved(thumbnail)
+        self._previous_thumbnail = thumbnail
+
+        models = []
+        carried = {}
+        for name in self.model_names:
+            if name == 'scooter' and not self._scooter_due(moved):
+                carried[name] = self._scooter_detections
+            elif name == 'button' and not self._button_due():
+                pass  # 교차로가 아니면 음향 신호기는 찾지 않음
+            else:
+                models.append(name)
+
+        self.stats['frames'] += 1
+        for name in self.model_names:
+            self.stats['invocations' if name in models else 'skipped'][name] += 1
+
+        return models, carried
+
+    def update(self, output, models):
+        """감지 결과로 다음 프레임 판단에 쓸 상태 갱신"""
+        _, _, detected_boxes, navigation_info, _ = output
+
+        if 'scooter' in models:
+            self._scooter_detections = Detections.from_records(detected_boxes, 'scooter')
+            self._frames_since_scooter = 0
+        elif self._frames_since_scooter is not None:
+            self._frames_since_scooter += 1
+
+        if navigation_info['direction'] == 'stop':
+            self._frames_since_stop = 0
+        elif self._frames_since_stop is not None:
+            self._frames_since_stop += 1
+
+    def _scooter_due(self, moved):
+        if self._frames_since_scooter is None or self.scooter_every <= 1:
+            return True
+        return moved or self._frames_since_scooter + 1 >= self.scooter_every
+
+    def _button_due(self):
+        if not self.button_on_stop:
+            return True
+        return self._frames_since_stop is not None and self._frames_since_stop < self.button_hold
+
+    def _thumbnail(self, image):
+        """움직임 비교용 축소 흑백 이미지"""
+        small = cv2.resize(image, self.thumbnail_size, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return small
+
+    def _moved(self, thumbnail):
+        """직전 프레임과의 평균 밝기 차이가 기준 이상인지"""
+        if not self.motion_threshold or self._previous_thumbnail is None \
+                or self._previous_thumbnail.shape != thumbnail.shape:
+            return False
+        return float(cv2.absdiff(thumbnail, self._previous_thumbnail).mean()) >= self.motion_threshold
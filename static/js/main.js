@@ -38,12 +38,29 @@ document.addEventListener('DOMContentLoaded', () => {
     let captureTimer = null;
     let grayscaleMode = false;
     
+    // 서버가 권장하는 캡처 설정 (result.capture로 갱신)
+    let captureInterval = 500; // 캡처 간격 (ms)
+    let maxCaptureWidth = 640; // 전송 프레임 최대 너비 (YOLO 입력 크기 이하)
+    let captureScale = 1; // 마지막으로 전송한 프레임의 비디오 대비 축소 비율
+    let resultScale = 1; // 현재 결과 좌표를 비디오 좌표로 바꾸는 배율
+    
     // 바운딩 박스와 네비게이션 데이터 저장
     let currentBoxes = [];
     let currentBoxData = []; // 클래스 정보가 포함된 박스 데이터
     let currentNavigation = null;
     let currentArrows = null; // 화살표 정보 저장
-    let renderTimer = null;
+    let renderFrame = null; // 예약된 requestAnimationFrame ID
+    let overlayDirty = false; // 마지막 렌더링 이후 결과/화면 크기가 바뀌었는지
+    
+    // 캡처용 캔버스 (한 번 만들어 재사용)
+    let captureCanvas = null;
+    let captureContext = null;
+    
+    // 압축 결과 형식 (서버 wire.py) - 지원하지 않는 서버는 기존 JSON을 그대로 보냄
+    const WIRE_VERSION = 1;
+    const WIRE_HISTORY = 8; // 변경분 기준으로 쓸 수 있게 기억할 최근 결과 프레임 수
+    const WIRE_STATE_FIELDS = ['navigation', 'arrows', 'grayscale_mode', 'capture'];
+    let wireStates = new Map(); // seq -> 복원한 결과 상태
     
     // TTS 관리 변수들
     let isTTSSpeaking = false;
@@ -184,6 +201,14 @@ document.addEventListener('DOMContentLoaded', () => {
             statusText.textContent = '서버에 연결되었습니다.';
             statusText.style.color = 'green';
             debugStatus.textContent = '연결됨';
+            
+            // 흑백 모드는 세션별 설정이므로 (재)연결할 때마다 현재 설정을 서버에 알림
+            if (grayscaleMode) {
+                socket.emit('toggle_grayscale', grayscaleMode);
+            }
+            
+            // 압축 결과 형식 요청 (새 세션이므로 이전 결과 상태는 버림)
+            requestResultFormat();
         });
         
         socket.on('disconnect', () => {
@@ -201,11 +226,36 @@ document.addEventListener('DOMContentLoaded', () => {
             }
         });
 
-        socket.on('result', (data) => {
+        socket.on('server_status', (data) => {
+            // 서버 모델이 아직 준비 중 - 보낸 프레임은 처리되지 않았으므로 다음 프레임을 보낼 수 있게 함
+            pendingRequest = false;
+            if (!data.ready) {
+                debugStatus.textContent = '모델 준비 중...';
+            }
+        });
+
+        socket.on('frame_error', (data) => {
+            // 서버가 프레임을 처리하지 못함 (잘못된 이미지, 모델 풀 오류 등) - 다음 프레임을 보낼 수 있게 함
+            pendingRequest = false;
+            debugStatus.textContent = '프레임 처리 실패';
+            console.warn('프레임 처리 실패:', data && data.error);
+        });
+
+        socket.on('backpressure', (data) => {
+            // 서버가 혼잡하여 이전 프레임이 버려졌거나 대기 중 (최신 프레임 결과만 도착함)
+            debugStatus.textContent = `서버 혼잡 (대기 ${data.queue_depth})`;
+            console.log('서버 혼잡 알림:', data);
+        });
+
+        socket.on('result', (message) => {
             // 이미지는 더 이상 표시하지 않음 (실시간 카메라 사용)
             pendingRequest = false;
             debugStatus.textContent = '처리 완료';
             
+            // 압축 형식이면 기존 JSON 형식으로 복원
+            const data = decodeResult(message);
+            if (!data) return;
+            
             console.log('🔍 서버 응답 데이터:', data);
             
             // 스쿠터 감지 전용 디버깅
@@ -227,6 +277,15 @@ document.addEventListener('DOMContentLoaded', () => {
                 updateGrayscaleMode(data.grayscale_mode);
             }
             
+            // 서버 부하에 맞춰 캡처 간격과 해상도 조정
+            if (data.capture) {
+                captureInterval = data.capture.interval || captureInterval;
+                maxCaptureWidth = data.capture.max_width || maxCaptureWidth;
+            }
+            
+            // 결과 좌표는 축소된 전송 프레임 기준이므로 비디오 좌표 배율 저장
+            resultScale = 1 / captureScale;
+            
             // 바운딩 박스 데이터 업데이트
             if (data.box_coords) {
                 currentBoxes = data.box_coords;
@@ -247,6 +306,9 @@ document.addEventListener('DOMContentLoaded', () => {
                 console.log('화살표 정보 업데이트:', currentArrows);
             }
             
+            // 새 결과가 왔을 때만 오버레이 다시 그림
+            requestRender();
+            
             // 네비게이션 정보 업데이트
             updateNavigationInfo(data);
             
@@ -262,6 +324,98 @@ document.addEventListener('DOMContentLoaded', () => {
         });
     }
     
+    // 서버에 압축(+변경분) 결과 형식 요청
+    function requestResultFormat() {
+        wireStates.clear();
+        socket.emit('result_format', { version: WIRE_VERSION, delta: true }, (reply) => {
+            console.log('결과 전송 형식:', reply && reply.version ? `압축 v${reply.version}` : 'JSON');
+        });
+    }
+    
+    // result 이벤트 -> 기존 JSON 형식 객체 (복원할 수 없으면 null)
+    function decodeResult(message) {
+        // 기존 JSON 형식은 그대로 사용
+        if (!message || message.v === undefined) return message;
+        if (message.v !== WIRE_VERSION) {
+            console.warn('지원하지 않는 결과 형식 버전:', message.v);
+            return null;
+        }
+        
+        let base = {};
+        if (message.base !== undefined) {
+            base = wireStates.get(message.base);
+            if (!base) {
+                // 기준 프레임을 잃어버렸으면 형식을 다시 요청해 전체 프레임부터 받음
+                requestResultFormat();
+                return null;
+            }
+        }
+        
+        // 기준 상태에 이번 프레임에서 바뀐 필드만 덮어씀
+        const state = Object.assign({}, base);
+        if (message.table) {
+            state.table = message.table;
+        }
+        WIRE_STATE_FIELDS.forEach((field) => {
+            if (message.hasOwnProperty(field)) {
+                state[field] = message[field];
+            }
+        });
+        if (message.boxes !== undefined) {
+            state.boxes = unpackBoxes(message.boxes, message.conf, state.table);
+        }
+        
+        wireStates.set(message.seq, state);
+        for (const seq of wireStates.keys()) {
+            if (seq <= message.seq - WIRE_HISTORY) {
+                wireStates.delete(seq);
+            }
+        }
+        socket.emit('result_ack', message.seq);
+        
+        const boxes = state.boxes || [];
+        return {
+            image: '',
+            classes: boxes.map(box => box.class),
+            boxes: boxes,
+            box_coords: boxes.map(box => box.box),
+            navigation: state.navigation,
+            arrows: state.arrows,
+            grayscale_mode: state.grayscale_mode,
+            capture: state.capture
+        };
+    }
+    
+    // int16 (N,5) 박스 배열 + uint8 신뢰도 -> 박스 객체 목록
+    function unpackBoxes(boxBytes, confBytes, table) {
+        const boxView = toDataView(boxBytes);
+        const confView = toDataView(confBytes);
+        const boxes = [];
+        for (let i = 0; i < confView.byteLength; i++) {
+            const offset = i * 10;
+            const entry = table[boxView.getInt16(offset + 8, true)] || ['Unknown', 'unknown'];
+            boxes.push({
+                class: entry[0],
+                confidence: confView.getUint8(i) / 255,
+                box: [
+                    boxView.getInt16(offset, true),
+                    boxView.getInt16(offset + 2, true),
+                    boxView.getInt16(offset + 4, true),
+                    boxView.getInt16(offset + 6, true)
+                ],
+                model: entry[1]
+            });
+        }
+        return boxes;
+    }
+    
+    function toDataView(bytes) {
+        if (bytes instanceof ArrayBuffer) {
+            return new DataView(bytes);
+        }
+        return new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+    }
+    
     // 캔버스 오버레이 생성 함수
     function createOverlayCanvas() {
         if (overlayCanvas) {
@@ -315,6 +469,9 @@ document.addEventListener('DOMContentLoaded', () => {
         overlayCanvas.style.height = rect.height + 'px';
         
         console.log(`캔버스 크기 조정: ${overlayCanvas.width}x${overlayCanvas.height} -> ${rect.width}x${rect.height}`);
+        
+        // 크기를 바꾸면 캔버스가 지워지므로 다시 그림
+        requestRender();
     }
     
     // 바운딩 박스와 화살표 렌더링
@@ -343,8 +500,8 @@ document.addEventListener('DOMContentLoaded', () => {
     function drawBoundingBoxes() {
         if (!video.videoWidth || !video.videoHeight) return;
         
-        const scaleX = overlayCanvas.width / video.videoWidth;
-        const scaleY = overlayCanvas.height / video.videoHeight;
+        const scaleX = overlayCanvas.width / video.videoWidth * resultScale;
+        const scaleY = overlayCanvas.height / video.videoHeight * resultScale;
         
         console.log(`바운딩 박스 그리기: ${currentBoxes.length}개, 스케일: ${scaleX.toFixed(2)}x${scaleY.toFixed(2)}`);
         
@@ -471,8 +628,8 @@ document.addEventListener('DOMContentLoaded', () => {
     function drawNavigationArrows() {
         if (!currentArrows || !currentArrows.arrows) return;
         
-        const scaleX = overlayCanvas.width / video.videoWidth;
-        const scaleY = overlayCanvas.height / video.videoHeight;
+        const scaleX = overlayCanvas.width / video.videoWidth * resultScale;
+        const scaleY = overlayCanvas.height / video.videoHeight * resultScale;
         
         // 상태 텍스트 표시
         if (currentArrows.state_text) {
@@ -568,23 +725,30 @@ document.addEventListener('DOMContentLoaded', () => {
     
     // 연속 렌더링 시작
     function startRendering() {
-        if (renderTimer) {
-            clearInterval(renderTimer);
-        }
-        
-        renderTimer = setInterval(() => {
-            if (isStreaming && overlayCanvas) {
+        requestRender();
+    }
+    
+    // 다음 화면 갱신 때 오버레이를 한 번 그리도록 예약 (결과나 화면 크기가 바뀔 때만 호출)
+    function requestRender() {
+        overlayDirty = true;
+        if (renderFrame || !isStreaming || !overlayCanvas) return;
+        
+        renderFrame = requestAnimationFrame(() => {
+            renderFrame = null;
+            if (overlayDirty && isStreaming && overlayCanvas) {
+                overlayDirty = false;
                 renderOverlay();
             }
-        }, 50); // 20 FPS로 오버레이 렌더링
+        });
     }
     
-    // 연속 렌더링 중지
+    // 예약된 렌더링 취소
     function stopRendering() {
-        if (renderTimer) {
-            clearInterval(renderTimer);
-            renderTimer = null;
+        if (renderFrame) {
+            cancelAnimationFrame(renderFrame);
+            renderFrame = null;
         }
+        overlayDirty = false;
     }
     function updateGrayscaleMode(isGrayscale) {
         grayscaleMode = isGrayscale;
@@ -976,7 +1140,7 @@ document.addEventListener('DOMContentLoaded', () => {
         }
         
         if (captureTimer) {
-            clearInterval(captureTimer);
+            clearTimeout(captureTimer);
             captureTimer = null;
         }
         
@@ -1019,34 +1183,95 @@ document.addEventListener('DOMContentLoaded', () => {
     // 프레임 캡처 시작
     function startCapture() {
         if (captureTimer) {
-            clearInterval(captureTimer);
+            clearTimeout(captureTimer);
         }
         
-        captureTimer = setInterval(() => {
-            if (isStreaming && socket && !pendingRequest) {
-                captureFrame();
-            }
-        }, 500); // 0.5초마다 프레임 캡처
+        // 서버가 권장한 간격마다 프레임 캡처 (기본 0.5초)
+        const scheduleNextCapture = () => {
+            captureTimer = setTimeout(() => {
+                if (isStreaming && socket && !pendingRequest) {
+                    captureFrame();
+                }
+                if (isStreaming) {
+                    scheduleNextCapture();
+                }
+            }, captureInterval);
+        };
+        scheduleNextCapture();
     }
     
     // 프레임 캡처 및 전송
     function captureFrame() {
         if (!socket || pendingRequest) return;
         
-        const canvas = document.createElement('canvas');
-        const context = canvas.getContext('2d');
-        
-        canvas.width = video.videoWidth;
-        canvas.height = video.videoHeight;
-        
-        context.drawImage(video, 0, 0);
-        
-        const imageData = canvas.toDataURL('image/jpeg', 0.8);
+        // 서버 권장 너비로 축소해서 캡처 (YOLO가 어차피 축소하므로 인코딩/전송량 절약)
+        captureScale = Math.min(1, maxCaptureWidth / video.videoWidth);
+        const canvas = getCaptureCanvas(
+            Math.round(video.videoWidth * captureScale),
+            Math.round(video.videoHeight * captureScale)
+        );
         
+        captureContext.drawImage(video, 0, 0, canvas.width, canvas.height);
+
         pendingRequest = true;
         lastRequestTime = Date.now();
         debugStatus.textContent = '처리 중...';
+
+        // JPEG 바이트를 바이너리 첨부로 전송 (base64 대비 약 33% 작음)
+        // 다음 캡처는 결과를 받은 뒤에 하므로 인코딩 중에 캔버스를 덮어쓰지 않음
+        encodeCaptureCanvas(canvas)
+            .then((blob) => blob ? blob.arrayBuffer() : null)
+            .then((buffer) => {
+                if (buffer) {
+                    socket.emit('image', buffer);
+                } else {
+                    sendDataURLFrame(canvas);
+                }
+            })
+            .catch(() => sendDataURLFrame(canvas));
+    }
+    
+    // 캡처 캔버스를 재사용하고 크기가 바뀔 때만 조정
+    // OffscreenCanvas.convertToBlob을 지원하면 DOM 캔버스 대신 사용 (JPEG 인코딩을 메인 스레드 밖에서 수행)
+    function getCaptureCanvas(width, height) {
+        if (!captureCanvas) {
+            if (typeof OffscreenCanvas !== 'undefined' && OffscreenCanvas.prototype.convertToBlob) {
+                captureCanvas = new OffscreenCanvas(width, height);
+            } else {
+                captureCanvas = document.createElement('canvas');
+            }
+            captureContext = captureCanvas.getContext('2d');
+        }
         
+        // width/height를 대입하면 같은 값이어도 캔버스가 초기화되므로 바뀐 경우만 설정
+        if (captureCanvas.width !== width) {
+            captureCanvas.width = width;
+        }
+        if (captureCanvas.height !== height) {
+            captureCanvas.height = height;
+        }
+        return captureCanvas;
+    }
+    
+    // 캡처 캔버스 -> JPEG Blob (지원하지 않으면 null)
+    function encodeCaptureCanvas(canvas) {
+        if (canvas.convertToBlob) {
+            return canvas.convertToBlob({ type: 'image/jpeg', quality: 0.8 });
+        }
+        if (canvas.toBlob) {
+            return new Promise((resolve) => canvas.toBlob(resolve, 'image/jpeg', 0.8));
+        }
+        return Promise.resolve(null);
+    }
+
+    // 바이너리 전송을 지원하지 않는 브라우저용 base64 data URL 전송
+    function sendDataURLFrame(canvas) {
+        if (!canvas.toDataURL) {
+            // OffscreenCanvas 인코딩 실패 - 이번 프레임은 건너뛰고 다음 캡처에서 다시 시도
+            pendingRequest = false;
+            return;
+        }
+        const imageData = canvas.toDataURL('image/jpeg', 0.8);
         socket.emit('image', imageData);
     }
     
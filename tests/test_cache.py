@@ -0,0 +1,114 @@
+import os
+
+import numpy as np
+
+import cache
+from cache import ResultCache
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def install_clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache.time, 'time', clock)
+    return clock
+
+
+def test_make_key_depends_on_image_grayscale_and_version():
+    image = np.zeros((4, 6, 3), dtype=np.uint8)
+    other = image.copy()
+    other[0, 0, 0] = 1
+
+    key = ResultCache.make_key(image, False, 'v1')
+    assert key == ResultCache.make_key(image.copy(), False, 'v1')
+    assert key != ResultCache.make_key(other, False, 'v1')
+    assert key != ResultCache.make_key(image, True, 'v1')
+    assert key != ResultCache.make_key(image, False, 'v2')
+    assert ResultCache.make_key(image, False, None) is None
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = install_clock(monkeypatch)
+    results = ResultCache(ttl=10)
+    results.put('key', [1, 2])
+
+    clock.now += 9
+    assert results.get('key') == [1, 2]
+    clock.now += 2
+    assert results.get('key') is None
+    assert len(results) == 0
+    assert (results.hits, results.misses) == (1, 1)
+
+
+def test_least_recently_used_entry_is_evicted():
+    results = ResultCache(max_entries=2)
+    results.put('a', 1)
+    results.put('b', 2)
+    assert results.get('a') == 1  # a를 최근 사용으로
+    results.put('c', 3)
+
+    assert results.get('b') is None
+    assert results.get('a') == 1
+    assert results.get('c') == 3
+
+
+def test_none_key_is_never_cached():
+    results = ResultCache()
+    results.put(None, 1)
+    assert results.get(None) is None
+    assert len(results) == 0
+
+
+def test_disk_tier_survives_new_instance(tmp_path):
+    ResultCache(disk_dir=str(tmp_path)).put('key', [[1, 2], {'state': 'straight'}])
+
+    reloaded = ResultCache(disk_dir=str(tmp_path))
+    assert reloaded.get('key') == [[1, 2], {'state': 'straight'}]
+    assert reloaded.hits == 1
+    assert len(reloaded) == 1  # 디스크에서 읽은 결과는 메모리로 올림
+
+
+def test_disk_entries_expire_by_mtime(tmp_path, monkeypatch):
+    ResultCache(disk_dir=str(tmp_path)).put('key', [1])
+    clock = install_clock(monkeypatch)
+    clock.now = (tmp_path / 'key.json').stat().st_mtime + 20
+
+    assert ResultCache(ttl=10, disk_dir=str(tmp_path)).get('key') is None
+    assert not (tmp_path / 'key.json').exists()
+
+
+def test_evicted_entry_is_reloaded_from_disk(tmp_path):
+    results = ResultCache(max_entries=1, disk_dir=str(tmp_path))
+    results.put('a', 1)
+    results.put('b', 2)
+
+    assert results.get('a') == 1
+
+
+def test_disk_tier_is_capped_by_bytes(tmp_path):
+    # 결과 하나가 JSON으로 102바이트 - 두 개까지만 들어감
+    results = ResultCache(max_entries=1, disk_dir=str(tmp_path), max_disk_bytes=250)
+    for key in ('a', 'b', 'c'):
+        results.put(key, 'x' * 100)
+
+    assert not (tmp_path / 'a.json').exists()
+    assert (tmp_path / 'b.json').exists()
+    assert (tmp_path / 'c.json').exists()
+
+
+def test_write_sweeps_expired_disk_files(tmp_path):
+    ResultCache(disk_dir=str(tmp_path)).put('old', [1])
+    (tmp_path / 'stale.json.1.2.tmp').write_text('[')
+    for name in ('old.json', 'stale.json.1.2.tmp'):
+        mtime = (tmp_path / name).stat().st_mtime - 100
+        os.utime(tmp_path / name, (mtime, mtime))
+
+    ResultCache(ttl=10, disk_dir=str(tmp_path)).put('new', [2])
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['new.json']
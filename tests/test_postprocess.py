@@ -0,0 +1,42 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from model import BlindNavigationModel, Detections
+
+
+FIXTURE = os.path.join(os.path.dirname(__file__), 'fixtures', 'postprocess_baseline.json')
+
+# 벡터화 이전(기존 반복문 구현)이 같은 감지 결과로 만든 네비게이션/화살표 정보
+with open(FIXTURE, encoding='utf-8') as f:
+    SCENES = json.load(f)['scenes']
+
+
+@pytest.fixture(scope='module')
+def model():
+    # 모델 파일 없이 후처리만 사용
+    return BlindNavigationModel(warmup=False)
+
+
+def detections(rows, name, threshold):
+    rows = np.array(rows, dtype=np.float64).reshape(-1, 6)
+    mask = rows[:, 4] >= threshold
+    return Detections(rows[mask, :4].astype(int), rows[mask, 4], rows[mask, 5].astype(int), name)
+
+
+@pytest.mark.parametrize('scene', SCENES, ids=[f'scene{index}' for index in range(len(SCENES))])
+def test_postprocess_matches_baseline(model, scene):
+    width, height = scene['size']
+    image = np.zeros((height, width, 3), dtype=np.uint8)
+    results = {'block': detections(scene['block'], 'block', model.model_conf_thresholds['block'])}
+    for name in ('scooter', 'button'):
+        if scene[name]:
+            results[name] = detections(scene[name], name, model.model_conf_thresholds[name])
+
+    output, _, _ = model._postprocess_frame(image, results)
+    _, _, _, navigation_info, arrow_info = output
+
+    assert navigation_info == scene['navigation']
+    assert arrow_info == scene['arrows']
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from model import BlindNavigationModel
+from preprocess import LetterboxPreprocessor
+
+
+def frame_with_box(height, width, box):
+    """검은 프레임에 흰 사각형 하나 (x1, y1, x2, y2)"""
+    frame = np.zeros((height, width, 3), dtype=np.uint8)
+    x1, y1, x2, y2 = box
+    frame[y1:y2, x1:x2] = 255
+    return frame
+
+
+def find_box(tensor):
+    """CHW 입력 텐서에서 흰 사각형의 입력 좌표 (x1, y1, x2, y2)"""
+    ys, xs = np.nonzero(np.asarray(tensor)[0] > 0.5)
+    return [xs.min(), ys.min(), xs.max() + 1, ys.max() + 1]
+
+
+def assert_round_trip(box_in_input, transform, expected):
+    restored = transform.to_original(np.array([box_in_input]))[0]
+    # 축소로 흐려진 경계는 입력 좌표 1픽셀 정도 차이날 수 있음
+    tolerance = 1.5 / transform.gain + 1
+    assert np.abs(restored - np.array(expected)).max() <= tolerance, (restored, expected)
+
+
+@pytest.mark.parametrize('shape', [(480, 640), (640, 480), (1080, 1920), (240, 320)])
+@pytest.mark.parametrize('rect', [True, False])
+def test_letterbox_boxes_map_back_to_original(shape, rect):
+    height, width = shape
+    box = (width // 4, height // 3, width // 2, height * 3 // 4)
+    preprocessor = LetterboxPreprocessor()
+
+    tensor, transforms, key, buffers = preprocessor([frame_with_box(height, width, box)], rect=rect)
+    try:
+        assert_round_trip(find_box(tensor[0]), transforms[0], box)
+    finally:
+        preprocessor.release(key, buffers)
+
+
+@pytest.mark.parametrize('imgsz, roi', [(480, (0, 0.4, 1, 1)), (960, (0, 0, 1, 0.6)), (320, (0.25, 0.3, 0.9, 0.95))])
+def test_roi_boxes_map_back_to_full_frame(imgsz, roi):
+    model = BlindNavigationModel(warmup=False)
+    model.set_model_input('block', imgsz=imgsz, roi=roi)
+    height, width = 720, 1280
+    # ROI 안쪽에 있는 사각형
+    box = (int(width * (roi[0] + 0.1)), int(height * (roi[1] + 0.05)),
+           int(width * (roi[0] + 0.3)), int(height * (roi[1] + 0.25)))
+
+    with model._prepared_inputs([frame_with_box(height, width, box)], 'block') as (tensor, transforms):
+        assert transforms[0].offset_x == int(round(roi[0] * width))
+        assert transforms[0].offset_y == int(round(roi[1] * height))
+        assert_round_trip(find_box(tensor[0]), transforms[0], box)
@@ -0,0 +1,41 @@
+import numpy as np
+
+from model import Detections
+from tracker import BoxTracker
+
+
+def block_detections(boxes, cls=0):
+    boxes = np.array(boxes, dtype=int).reshape(-1, 4)
+    return Detections(boxes, np.full(len(boxes), 0.9), np.full(len(boxes), cls, dtype=int), 'block')
+
+
+def test_matched_box_keeps_track_and_predicts_motion():
+    tracker = BoxTracker('block')
+    tracker.update(block_detections([[100, 100, 200, 200]]), (480, 640))
+    tracker.update(block_detections([[110, 100, 210, 200]]), (480, 640))
+
+    assert len(tracker) == 1
+    predicted = tracker.predict()
+    assert predicted.xyxy[0, 0] > 110
+
+
+def test_unmatched_box_is_dropped_after_max_misses():
+    tracker = BoxTracker('block', max_misses=1)
+    tracker.update(block_detections([[100, 100, 200, 200]]), (480, 640))
+
+    tracker.update(block_detections([]), (480, 640))
+    assert len(tracker) == 1
+    tracker.update(block_detections([]), (480, 640))
+    assert len(tracker) == 0
+
+
+def test_frame_shape_change_resets_tracks():
+    tracker = BoxTracker('block')
+    tracker.update(block_detections([[100, 100, 200, 200], [300, 300, 360, 400]]), (480, 640))
+    assert len(tracker) == 2
+
+    # 캡처 해상도가 바뀌면 이전 좌표계의 박스는 이어 쓰지 않음
+    result = tracker.update(block_detections([[50, 50, 100, 100]]), (240, 320))
+    assert len(tracker) == 1
+    assert result.xyxy.tolist() == [[50, 50, 100, 100]]
+    assert tracker.image_shape == (240, 320)
@@ -0,0 +1,150 @@
+import numpy as np
+
+from wire import ResultEncoder, STATE_FIELDS
+
+
+def make_response(boxes, state='straight'):
+    return {
+        'boxes': boxes,
+        'navigation': {'state': state, 'direction': 'forward', 'warnings': [], 'obstacles': []},
+        'arrows': {'arrows': [], 'state_text': '', 'state_color': '#FFFF00'},
+        'grayscale_mode': False,
+        'capture': {'interval': 200, 'max_width': 640},
+    }
+
+
+class Decoder:
+    """main.js decodeResult와 같은 방식으로 메시지를 복원하는 테스트용 클라이언트"""
+
+    def __init__(self):
+        self.states = {}
+
+    def decode(self, message):
+        base = self.states[message['base']] if 'base' in message else {}
+        state = dict(base)
+        if 'table' in message:
+            state['table'] = message['table']
+        for field in STATE_FIELDS:
+            if field in message:
+                state[field] = message[field]
+        if 'boxes' in message:
+            rows = np.frombuffer(message['boxes'], dtype='<i2').reshape(-1, 5)
+            conf = np.frombuffer(message['conf'], dtype=np.uint8)
+            state['boxes'] = [
+                {'class': state['table'][row[4]][0], 'model': state['table'][row[4]][1],
+                 'box': row[:4].tolist(), 'confidence': int(value) / 255}
+                for row, value in zip(rows, conf)
+            ]
+        self.states[message['seq']] = state
+        return state
+
+
+BOX_A = {'class': 'Stop', 'confidence': 0.9, 'box': [10, 20, 110, 220], 'model': 'block'}
+BOX_B = {'class': 'Scooter', 'confidence': 0.6, 'box': [300, 40, 360, 200], 'model': 'scooter'}
+
+
+def assert_same(state, response):
+    for field in STATE_FIELDS:
+        assert state[field] == response[field]
+    assert len(state['boxes']) == len(response['boxes'])
+    for decoded, original in zip(state['boxes'], response['boxes']):
+        assert decoded['class'] == original['class']
+        assert decoded['model'] == original['model']
+        assert decoded['box'] == original['box']
+        assert abs(decoded['confidence'] - original['confidence']) <= 1 / 255
+
+
+def test_first_frame_is_full():
+    encoder = ResultEncoder()
+    response = make_response([BOX_A, BOX_B])
+    message = encoder.encode(response)
+
+    assert 'base' not in message
+    assert 'table' in message
+    assert_same(Decoder().decode(message), response)
+
+
+def test_unchanged_frame_after_ack_sends_only_header():
+    encoder = ResultEncoder()
+    decoder = Decoder()
+    response = make_response([BOX_A])
+    decoder.decode(encoder.encode(response))
+    encoder.ack(1)
+
+    message = encoder.encode(response)
+    assert set(message) == {'v', 'seq', 'base'}
+    assert message['base'] == 1
+    assert_same(decoder.decode(message), response)
+
+
+def test_delta_sends_only_changed_fields():
+    encoder = ResultEncoder()
+    decoder = Decoder()
+    decoder.decode(encoder.encode(make_response([BOX_A])))
+    encoder.ack(1)
+
+    response = make_response([BOX_A, BOX_B], state='intersection')
+    message = encoder.encode(response)
+    assert 'navigation' in message and 'boxes' in message
+    assert 'arrows' not in message and 'capture' not in message
+    assert_same(decoder.decode(message), response)
+
+
+def test_without_ack_every_frame_is_full():
+    encoder = ResultEncoder()
+    encoder.encode(make_response([BOX_A]))
+    message = encoder.encode(make_response([BOX_A]))
+    assert 'base' not in message
+    assert 'boxes' in message
+
+
+def test_late_ack_after_newer_frame_was_sent():
+    encoder = ResultEncoder()
+    decoder = Decoder()
+    responses = [make_response([BOX_A]), make_response([BOX_B]), make_response([BOX_A, BOX_B], 'intersection')]
+
+    decoder.decode(encoder.encode(responses[0]))
+    encoder.ack(1)
+    decoder.decode(encoder.encode(responses[1]))    # seq 2 (기준 1)
+    third = encoder.encode(responses[2])            # seq 3 (기준 1) - seq 2의 ack가 아직 안 옴
+    assert third['base'] == 1
+    assert_same(decoder.decode(third), responses[2])
+
+    # seq 3을 보낸 뒤에 도착한 seq 2의 ack
+    encoder.ack(2)
+    fourth = encoder.encode(responses[2])
+    assert fourth['base'] == 2
+    assert_same(decoder.decode(fourth), responses[2])
+
+
+def test_ack_older_than_latest_ack_is_ignored():
+    encoder = ResultEncoder()
+    for _ in range(3):
+        encoder.encode(make_response([BOX_A]))
+    encoder.ack(3)
+    encoder.ack(2)  # 순서가 뒤바뀐 오래된 ack
+
+    assert encoder.encode(make_response([BOX_A]))['base'] == 3
+
+
+def test_ack_outside_history_falls_back_to_full_frame():
+    encoder = ResultEncoder(history=2)
+    for _ in range(4):
+        encoder.encode(make_response([BOX_A]))
+    encoder.ack(1)  # 이미 기록에서 밀려난 프레임
+
+    message = encoder.encode(make_response([BOX_A]))
+    assert 'base' not in message
+
+
+def test_unknown_class_extends_table():
+    encoder = ResultEncoder()
+    decoder = Decoder()
+    decoder.decode(encoder.encode(make_response([BOX_A])))
+    encoder.ack(1)
+
+    unknown = {'class': 'Block_Class_7', 'confidence': 0.5, 'box': [1, 2, 3, 4], 'model': 'block'}
+    response = make_response([BOX_A, unknown])
+    message = encoder.encode(response)
+    assert ['Block_Class_7', 'block'] in message['table']
+    assert_same(decoder.decode(message), response)
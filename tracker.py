@@ -0,0 +1,244 @@
+import numpy as np
+
+from model import Detections
+from scheduler import ModelScheduler
+
+
+def _iou_matrix(boxes_a, boxes_b):
+    """두 박스 집합 (N,4), (M,4) 사이의 IoU 행렬 (N,M)"""
+    x1 = np.maximum(boxes_a[:, None, 0], boxes_b[None, :, 0])
+    y1 = np.maximum(boxes_a[:, None, 1], boxes_b[None, :, 1])
+    x2 = np.minimum(boxes_a[:, None, 2], boxes_b[None, :, 2])
+    y2 = np.minimum(boxes_a[:, None, 3], boxes_b[None, :, 3])
+    intersection = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+
+    area_a = (boxes_a[:, 2] - boxes_a[:, 0]) * (boxes_a[:, 3] - boxes_a[:, 1])
+    area_b = (boxes_b[:, 2] - boxes_b[:, 0]) * (boxes_b[:, 3] - boxes_b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - intersection
+    return np.where(union > 0, intersection / np.maximum(union, 1e-9), 0.0)
+
+
+class BoxTracker:
+    def __init__(self, model_name, iou_threshold=0.3, centroid_threshold=0.05, max_misses=2, velocity_smoothing=0.5):
+        """프레임 간 같은 물체의 박스를 IoU(안 겹치면 중심 거리)로 이어 주는 추적기
+
+        centroid_threshold: 이미지 대각선 대비 허용 중심 이동 거리 비율
+        max_misses: 연속으로 감지되지 않아도 유지할 추론 횟수
+        """
+        self.model_name = model_name
+        self.iou_threshold = iou_threshold
+        self.centroid_threshold = centroid_threshold
+        self.max_misses = max_misses
+        self.velocity_smoothing = velocity_smoothing
+        self.reset()
+
+    def reset(self):
+        """추적 중인 박스 모두 삭제"""
+        self.boxes = np.empty((0, 4), dtype=np.float64)     # 현재 예측 위치
+        self.velocity = np.empty((0, 4), dtype=np.float64)  # 프레임당 이동량
+        self.conf = np.empty(0, dtype=np.float64)
+        self.cls = np.empty(0, dtype=int)
+        self.misses = np.empty(0, dtype=int)
+        self.age = np.empty(0, dtype=int)                   # 마지막 관측 이후 지난 프레임 수
+        self.image_shape = None
+
+    def __len__(self):
+        return len(self.conf)
+
+    def predict(self):
+        """추론 없이 한 프레임 진행 - 속도만큼 이동한 박스를 Detections로 반환"""
+        if len(self):
+            self.boxes = self.boxes + self.velocity
+            self.age = self.age + 1
+        return self._as_detections()
+
+    def update(self, detections, image_shape):
+        """새 감지 결과로 추적 박스 갱신"""
+        if self.image_shape is not None and self.image_shape != image_shape:
+            # 캡처 해상도가 바뀌면 좌표계가 달라지므로 처음부터 다시 추적
+            self.reset()
+        self.image_shape = image_shape
+
+        observed = detections.xyxy.astype(np.float64)
+        matched_tracks, matched_detections = self._associate(observed, detections.cls, image_shape)
+
+        # 매칭된 박스: 위치/속도 갱신
+        if len(matched_tracks):
+            previous = self.boxes[matched_tracks] - self.velocity[matched_tracks] * self.age[matched_tracks, None]
+            step = (observed[matched_detections] - previous) / (self.age[matched_tracks, None] + 1)
+            self.velocity[matched_tracks] = (self.velocity_smoothing * self.velocity[matched_tracks]
+                                             + (1 - self.velocity_smoothing) * step)
+            self.boxes[matched_tracks] = observed[matched_detections]
+            self.conf[matched_tracks] = detections.conf[matched_detections]
+            self.misses[matched_tracks] = 0
+
+        # 매칭되지 않은 기존 박스: 놓친 횟수 증가, 한도를 넘으면 삭제
+        unmatched = np.ones(len(self), dtype=bool)
+        unmatched[matched_tracks] = False
+        self.misses[unmatched] += 1
+        self.age[:] = 0
+
+        keep = self.misses <= self.max_misses
+        self.boxes, self.velocity = self.boxes[keep], self.velocity[keep]
+        self.conf, self.cls = self.conf[keep], self.cls[keep]
+        self.misses, self.age = self.misses[keep], self.age[keep]
+
+        # 매칭되지 않은 감지: 새 추적 박스
+        new = np.ones(len(detections), dtype=bool)
+        new[matched_detections] = False
+        if new.any():
+            count = int(new.sum())
+            self.boxes = np.concatenate([self.boxes, observed[new]])
+            self.velocity = np.concatenate([self.velocity, np.zeros((count, 4))])
+            self.conf = np.concatenate([self.conf, detections.conf[new]])
+            self.cls = np.concatenate([self.cls, detections.cls[new]])
+            self.misses = np.concatenate([self.misses, np.zeros(count, dtype=int)])
+            self.age = np.concatenate([self.age, np.zeros(count, dtype=int)])
+
+        return self._as_detections()
+
+    def _associate(self, observed, observed_cls, image_shape):
+        """IoU가 큰 쌍부터 탐욕적으로 매칭하고, 남은 박스는 중심 거리로 매칭"""
+        if not len(self) or not len(observed):
+            return np.empty(0, dtype=int), np.empty(0, dtype=int)
+
+        same_class = self.cls[:, None] == observed_cls[None, :]
+        iou = np.where(same_class, _iou_matrix(self.boxes, observed), 0.0)
+
+        centers = (self.boxes[:, :2] + self.boxes[:, 2:]) / 2
+        observed_centers = (observed[:, :2] + observed[:, 2:]) / 2
+        distance = np.linalg.norm(centers[:, None, :] - observed_centers[None, :, :], axis=2)
+        max_distance = self.centroid_threshold * float(np.hypot(image_shape[0], image_shape[1]))
+        distance = np.where(same_class, distance, np.inf)
+
+        matched_tracks, matched_detections = [], []
+        track_free = np.ones(len(self), dtype=bool)
+        detection_free = np.ones(len(observed), dtype=bool)
+
+        # IoU 기준 매칭
+        for flat_index in np.argsort(-iou, axis=None, kind='stable'):
+            track, detection = divmod(int(flat_index), len(observed))
+            if iou[track, detection] < self.iou_threshold:
+                break
+            if track_free[track] and detection_free[detection]:
+                track_free[track] = detection_free[detection] = False
+                matched_tracks.append(track)
+                matched_detections.append(detection)
+
+        # 작은 박스처럼 IoU가 낮은 경우 중심 거리 기준 매칭
+        for flat_index in np.argsort(distance, axis=None, kind='stable'):
+            track, detection = divmod(int(flat_index), len(observed))
+            if distance[track, detection] > max_distance:
+                break
+            if track_free[track] and detection_free[detection]:
+                track_free[track] = detection_free[detection] = False
+                matched_tracks.append(track)
+                matched_detections.append(detection)
+
+        return np.array(matched_tracks, dtype=int), np.array(matched_detections, dtype=int)
+
+    def _as_detections(self):
+        """현재 추적 박스를 Detections로 변환 (이미지 밖으로 나간 좌표는 잘라냄)"""
+        if not len(self):
+            return Detections.empty(self.model_name)
+
+        boxes = self.boxes
+        if self.image_shape is not None:
+            h, w = self.image_shape[:2]
+            boxes = np.clip(boxes, 0, [w, h, w, h])
+        return Detections(boxes.astype(int), self.conf.copy(), self.cls.copy(), self.model_name)
+
+
+class NavigationSmoother:
+    def __init__(self, hold_frames=2):
+        """상태/방향이 hold_frames 프레임 연속 같을 때만 바꾸는 히스테리시스 필터"""
+        self.hold_frames = hold_frames
+        self.state = None
+        self.direction = None
+        self._candidate = None
+        self._candidate_count = 0
+        self._arrow_info = {}  # 상태별 마지막 화살표 정보
+
+    def update(self, navigation_info, arrow_info):
+        """이번 프레임의 안내 정보를 받아 안정화된 (navigation_info, arrow_info) 반환"""
+        observed = (navigation_info['state'], navigation_info['direction'])
+        self._arrow_info[observed[0]] = arrow_info
+
+        if self.state is None:
+            self.state, self.direction = observed
+        elif observed == (self.state, self.direction):
+            self._candidate = None
+            self._candidate_count = 0
+        else:
+            if observed == self._candidate:
+                self._candidate_count += 1
+            else:
+                self._candidate = observed
+                self._candidate_count = 1
+            if self._candidate_count >= self.hold_frames:
+                self.state, self.direction = observed
+                self._candidate = None
+                self._candidate_count = 0
+
+        if observed[0] == self.state:
+            return navigation_info, arrow_info
+
+        # 바뀌기 전 상태를 유지하고, 화살표도 그 상태의 마지막 것을 사용
+        smoothed = dict(navigation_info)
+        smoothed['state'] = self.state
+        smoothed['direction'] = self.direction
+        smoothed['warnings'] = [
+            warning for warning in navigation_info['warnings'] if warning != '전방에 장애물이 있으니 주의하세요'
+        ]
+        if smoothed['obstacles'] and smoothed['direction'] == 'forward':
+            smoothed['warnings'].append('전방에 장애물이 있으니 주의하세요')
+        return smoothed, self._arrow_info.get(self.state, arrow_info)
+
+
+class SessionTracker:
+    def __init__(self, model_names, block_interval=3, hold_frames=2, scheduler=None):
+        """세션(카메라 한 대)별 추적 상태
+
+        - 블록 모델은 block_interval 프레임마다 한 번만 실행하고, 그 사이에는 추적 박스를 이어 사용
+        - 스쿠터/음향 신호기 모델 실행 여부는 ModelScheduler가 결정
+        - 안내 상태는 NavigationSmoother로 안정화
+        """
+        self.model_names = list(model_names)
+        self.block_interval = block_interval
+        self.block_tracker = BoxTracker('block')
+        self.smoother = NavigationSmoother(hold_frames)
+        self.scheduler = scheduler or ModelScheduler(self.model_names)
+        self._frames_since_block = None
+        self._image_shape = None
+
+    def plan(self, image):
+        """이번 프레임에 실행할 모델 목록과 대신 넘길 감지 결과 반환 (모든 모델을 실행하면 models는 None)"""
+        models, carried = self.scheduler.plan(image)
+
+        block_due = (self.block_interval <= 1 or self._frames_since_block is None
+                     or self._frames_since_block + 1 >= self.block_interval
+                     or image.shape[:2] != self._image_shape)
+        if 'block' in models and not block_due:
+            models.remove('block')
+            carried['block'] = self.block_tracker.predict()
+
+        if models == self.model_names:
+            return None, None
+        return models, carried
+
+    def update(self, image_shape, output, models):
+        """감지 결과로 추적 상태를 갱신하고 안내 정보를 안정화한 결과 반환"""
+        image_shape = tuple(image_shape[:2])
+        all_box_coords, detected_classes, detected_boxes, navigation_info, arrow_info = output
+        models = self.model_names if models is None else models
+        self.scheduler.update(output, models)
+
+        if 'block' in models:
+            self.block_tracker.update(Detections.from_records(detected_boxes, 'block'), image_shape)
+            self._frames_since_block = 0
+            self._image_shape = image_shape
+        else:
+            self._frames_since_block += 1
+
+        navigation_info, arrow_info = self.smoother.update(navigation_info, arrow_info)
+        return all_box_coords, detected_classes, detected_boxes, navigation_info, arrow_info
@@ -0,0 +1,163 @@
+import queue
+import threading
+import time
+
+import cv2
+
+
+LIVE_SOURCE_PREFIXES = ('rtsp://', 'rtmp://', 'http://', 'https://', 'udp://', 'tcp://')
+
+
+def is_live_source(source):
+    """카메라 번호나 스트림 URL이면 실시간 입력으로 간주"""
+    if isinstance(source, int):
+        return True
+    return str(source).isdigit() or str(source).lower().startswith(LIVE_SOURCE_PREFIXES)
+
+
+class VideoIngestor:
+    def __init__(self, model, source, realtime=None, diff_threshold=3.0, max_reuse=15,
+                 thumbnail_size=(64, 36), buffer_size=4, scheduler=None):
+        """비디오 파일/스트림을 백그라운드에서 디코딩하며 감지하는 입력기
+
+        - 실시간 입력은 추론이 끝날 때 가장 최근 프레임만 처리 (밀린 프레임은 버림)
+        - realtime=True인 파일 입력은 추론 속도에 맞춰 건너뛸 프레임 간격을 조절
+        - 직전 추론 프레임과 거의 같은 프레임은 이전 감지 결과를 재사용
+        - scheduler(ModelScheduler)가 있으면 프레임마다 필요한 모델만 실행
+        - buffer_size: 파일 입력에서 미리 디코딩해 둘 프레임 수 (실시간 입력은 항상 1)
+        """
+        self.model = model
+        self.source = int(source) if str(source).isdigit() else source
+        self.live = is_live_source(self.source)
+        self.realtime = self.live if realtime is None else realtime
+        self.diff_threshold = diff_threshold  # 축소 흑백 프레임 평균 밝기 차이 (0~255)
+        self.max_reuse = max_reuse            # 연속 재사용 최대 횟수 (이후 반드시 다시 추론)
+        self.thumbnail_size = thumbnail_size
+        self.buffer_size = buffer_size
+        self.scheduler = scheduler
+
+        self.stride = 1  # 파일 입력에서 몇 프레임마다 하나를 디코딩할지
+        self.stats = {'decoded': 0, 'skipped': 0, 'inferred': 0, 'reused': 0}
+
+        # 실시간 입력은 한 칸짜리 최신 프레임 보관함 (새 프레임이 오면 처리 전 프레임을 덮어씀)
+        self._frames = queue.Queue(maxsize=1 if self.live else buffer_size)
+        self._stop = threading.Event()
+        self._stats_lock = threading.Lock()
+
+    def __iter__(self):
+        return self.frames()
+
+    def frames(self):
+        """(프레임 번호, 이미지, 감지 결과, 재사용 여부) 생성"""
+        capture = cv2.VideoCapture(self.source)
+        if not capture.isOpened():
+            print(f"⚠️ 비디오를 열 수 없습니다: {self.source}")
+            return
+
+        fps = capture.get(cv2.CAP_PROP_FPS) or 0
+        self._stop.clear()
+        decoder = threading.Thread(target=self._decode_loop, args=(capture,), name='video-decoder', daemon=True)
+        decoder.start()
+
+        previous_thumbnail = None
+        previous_output = None
+        reuse_count = 0
+        average_inference = None
+
+        try:
+            while True:
+                item = self._frames.get()
+                if item is None:
+                    break
+                index, frame = item
+
+                # 직전 추론 프레임과 거의 같으면 감지 결과 재사용
+                thumbnail = self._thumbnail(frame)
+                if (previous_output is not None and reuse_count < self.max_reuse
+                        and self._frame_difference(thumbnail, previous_thumbnail) < self.diff_threshold):
+                    reuse_count += 1
+                    self._count('reused')
+                    yield index, frame, previous_output, True
+                    continue
+
+                start = time.perf_counter()
+                if self.scheduler is not None:
+                    models, carried = self.scheduler.plan(frame)
+                    output = self.model.detect(frame, models, carried)
+                    self.scheduler.update(output, models)
+                else:
+                    output = self.model.detect(frame)
+                elapsed = time.perf_counter() - start
+                self._count('inferred')
+
+                average_inference = elapsed if average_inference is None else 0.8 * average_inference + 0.2 * elapsed
+                if self.realtime and not self.live and fps > 0:
+                    # 추론 한 번 동안 재생되는 프레임 수만큼 건너뛰어 실시간 속도 유지
+                    self.stride = max(1, int(average_inference * fps))
+
+                previous_thumbnail = thumbnail
+                previous_output = output
+                reuse_count = 0
+                yield index, frame, output, False
+        finally:
+            self._stop.set()
+            # 디코더가 put에서 막혀 있지 않도록 비움
+            while decoder.is_alive():
+                try:
+                    self._frames.get_nowait()
+                except queue.Empty:
+                    pass
+                decoder.join(timeout=0.05)
+            capture.release()
+
+    def _decode_loop(self, capture):
+        """백그라운드 디코딩 - 건너뛸 프레임은 grab만 하고 retrieve하지 않음"""
+        index = 0
+        while not self._stop.is_set():
+            if not capture.grab():
+                break
+            if not self.live and index % self.stride:
+                index += 1
+                self._count('skipped')
+                continue
+
+            ok, frame = capture.retrieve()
+            if not ok:
+                break
+            self._count('decoded')
+            self._put((index, frame))
+            index += 1
+
+        self._put(None)
+
+    def _put(self, item):
+        """실시간 입력은 아직 처리하지 않은 이전 프레임을 버리고, 파일 입력은 자리가 날 때까지 대기"""
+        while not self._stop.is_set():
+            try:
+                if self.live:
+                    self._frames.put_nowait(item)
+                else:
+                    self._frames.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                if self.live:
+                    try:
+                        self._frames.get_nowait()
+                        self._count('skipped')
+                    except queue.Empty:
+                        pass
+
+    def _count(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def _thumbnail(self, frame):
+        """프레임 차이 비교용 축소 흑백 이미지"""
+        small = cv2.resize(frame, self.thumbnail_size, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return small
+
+    def _frame_difference(self, thumbnail, previous_thumbnail):
+        """두 축소 프레임의 평균 절대 밝기 차이"""
+        return float(cv2.absdiff(thumbnail, previous_thumbnail).mean())
@@ -0,0 +1,104 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from model import FUSED_CLASS_MAP
+
+
+# 압축 결과 형식 버전 (클라이언트가 result_format 이벤트로 요청한 버전과 같을 때만 사용)
+WIRE_VERSION = 1
+
+# 박스 배열 한 행: x1, y1, x2, y2, 클래스 표 인덱스 (little-endian int16)
+BOX_FIELDS = 5
+
+# 매 프레임 보내지 않고 바뀌었을 때만 보내는 필드
+STATE_FIELDS = ('navigation', 'arrows', 'grayscale_mode', 'capture')
+
+
+class ResultEncoder:
+    def __init__(self, delta=True, history=8):
+        """세션별 result 이벤트 압축기
+
+        - 박스는 int16 (N,5) 배열 + uint8 신뢰도 배열로, 클래스/모델 이름은 클래스 표 인덱스로 전송
+        - delta=True이면 클라이언트가 확인(ack)한 마지막 프레임과 달라진 필드만 전송
+        - history: ack를 기다리는 동안 기억할 보낸 프레임 수 (이보다 오래된 ack는 무시하고 전체 전송)
+        """
+        self.delta = delta
+        self.history = history
+        self.seq = 0
+
+        # 클래스 표: [클래스 이름, 모델 이름] 목록 (처음 보는 클래스는 뒤에 추가)
+        self._table = [[class_name, model_name] for class_name, (model_name, _) in FUSED_CLASS_MAP.items()]
+        self._table_index = {tuple(entry): index for index, entry in enumerate(self._table)}
+
+        self._sent = OrderedDict()  # seq -> 보낸 상태 (ack 대기)
+        self._acked = None          # 클라이언트가 마지막으로 확인한 상태
+        self._lock = threading.Lock()
+
+    def encode(self, response_data):
+        """응답 데이터(JSON 형식)를 압축 형식 딕셔너리로 변환"""
+        state = {field: response_data.get(field) for field in STATE_FIELDS}
+        boxes, conf = self._pack_boxes(response_data.get('boxes') or [])
+        state['boxes'] = boxes
+        state['conf'] = conf
+        state['table_size'] = len(self._table)
+
+        with self._lock:
+            self.seq += 1
+            base = self._acked if self.delta else None
+
+            message = {'v': WIRE_VERSION, 'seq': self.seq}
+            if base is None:
+                # 기준 프레임이 없으면 전체 전송
+                message['table'] = list(self._table)
+                changed = STATE_FIELDS + ('boxes',)
+            else:
+                message['base'] = base['seq']
+                if base['table_size'] != state['table_size']:
+                    message['table'] = list(self._table)
+                changed = [field for field in STATE_FIELDS if state[field] != base[field]]
+                if (boxes, conf) != (base['boxes'], base['conf']):
+                    changed.append('boxes')
+
+            for field in changed:
+                if field == 'boxes':
+                    message['boxes'] = boxes
+                    message['conf'] = conf
+                else:
+                    message[field] = state[field]
+
+            state['seq'] = self.seq
+            self._sent[self.seq] = state
+            while len(self._sent) > self.history:
+                self._sent.popitem(last=False)
+        return message
+
+    def ack(self, seq):
+        """클라이언트가 seq 프레임을 받아 적용했음을 기록 (다음 프레임은 이 프레임 기준 변경분만 전송)"""
+        with self._lock:
+            state = self._sent.get(seq)
+            if state is None:
+                return
+            self._acked = state
+            # 확인된 프레임보다 오래된 기록은 더 이상 기준으로 쓰지 않음
+            for old_seq in [old_seq for old_seq in self._sent if old_seq < seq]:
+                del self._sent[old_seq]
+
+    def _pack_boxes(self, boxes):
+        """박스 딕셔너리 목록 -> (int16 박스 바이트, uint8 신뢰도 바이트)"""
+        packed = np.empty((len(boxes), BOX_FIELDS), dtype='<i2')
+        conf = np.empty(len(boxes), dtype=np.uint8)
+        for row, box in enumerate(boxes):
+            packed[row, :4] = np.clip(np.round(box['box']), -32768, 32767)
+            packed[row, 4] = self._class_index(box['class'], box['model'])
+            conf[row] = round(min(max(box['confidence'], 0.0), 1.0) * 255)
+        return packed.tobytes(), conf.tobytes()
+
+    def _class_index(self, class_name, model_name):
+        index = self._table_index.get((class_name, model_name))
+        if index is None:
+            index = len(self._table)
+            self._table.append([class_name, model_name])
+            self._table_index[(class_name, model_name)] = index
+        return index
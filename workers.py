@@ -0,0 +1,545 @@
+import argparse
+import atexit
+import itertools
+import multiprocessing
+import os
+import queue
+import socket
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future
+from multiprocessing import resource_tracker, shared_memory
+from multiprocessing.managers import BaseManager
+
+import numpy as np
+
+from backends import DEFAULT_MODEL_PATHS
+
+
+DEFAULT_ADDRESS = ('127.0.0.1', 50055)
+DEFAULT_AUTHKEY = os.environ.get('MODEL_POOL_AUTHKEY', 'blind-road-helper-pool').encode()
+DEFAULT_SLOT_BYTES = 1920 * 1080 * 3  # 1080p BGR 프레임 하나
+# 작업 하나를 기다리는 최대 시간 (워커가 죽거나 멈추면 이 시간 뒤 실패 처리하고 슬롯 회수)
+DEFAULT_TASK_TIMEOUT = float(os.environ.get('MODEL_POOL_TIMEOUT', '30'))
+# 이 시간 동안 heartbeat가 없는 프런트엔드의 결과 대기열은 풀 서버에서 지움
+RESULTS_IDLE_TIMEOUT = 60.0
+HEARTBEAT_INTERVAL = 5.0
+# 워커가 열어 둘 프런트엔드 공유 메모리/결과 대기열 수 (오래 안 쓴 것부터 닫음)
+MAX_ATTACHED_SEGMENTS = 32
+MAX_REPLY_QUEUES = 16
+
+
+class PoolManager(BaseManager):
+    """작업/결과 대기열을 TCP로 공유하는 매니저 - 여러 프런트엔드와 모델 워커가 같은 풀에 접속"""
+
+
+# 풀 서버 프로세스 안에서만 쓰는 대기열
+_task_queue = queue.Queue()
+_worker_status = {}
+_worker_versions = {}
+
+
+class _ResultQueues:
+    """프런트엔드별 결과 대기열 - 종료했거나 heartbeat가 끊긴 프런트엔드의 대기열은 지움"""
+
+    def __init__(self):
+        self._queues = {}
+        self._seen = {}  # 이름 -> 마지막 heartbeat (풀 서버 시각)
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        with self._lock:
+            self._seen.setdefault(name, time.monotonic())
+            self._drop_idle()
+            return self._queues.setdefault(name, queue.Queue())
+
+    def heartbeat(self, name):
+        with self._lock:
+            self._seen[name] = time.monotonic()
+            self._drop_idle()
+
+    def drop(self, name):
+        with self._lock:
+            self._seen.pop(name, None)
+            self._queues.pop(name, None)
+
+    def _drop_idle(self):
+        now = time.monotonic()
+        for name in [name for name, seen in self._seen.items() if now - seen > RESULTS_IDLE_TIMEOUT]:
+            del self._seen[name]
+            self._queues.pop(name, None)
+
+
+_result_queues = _ResultQueues()
+
+
+def _get_tasks():
+    return _task_queue
+
+
+def _get_results(name):
+    return _result_queues.get(name)
+
+
+def _get_clients():
+    return _result_queues
+
+
+def _get_status():
+    return _worker_status
+
+
+def _get_versions():
+    return _worker_versions
+
+
+PoolManager.register('tasks', callable=_get_tasks)
+PoolManager.register('results', callable=_get_results)
+PoolManager.register('clients', callable=_get_clients, exposed=('heartbeat', 'drop'))
+PoolManager.register('status', callable=_get_status)
+PoolManager.register('versions', callable=_get_versions)
+
+
+def parse_address(text):
+    """'host:port' -> (host, port)"""
+    host, port = text.rsplit(':', 1)
+    return host, int(port)
+
+
+def serve_pool(address=DEFAULT_ADDRESS, authkey=DEFAULT_AUTHKEY):
+    """작업/결과 대기열 서버 실행 (반환하지 않음)"""
+    manager = PoolManager(address=address, authkey=authkey)
+    print(f"모델 풀 대기열 서버 시작: {address[0]}:{address[1]}")
+    manager.get_server().serve_forever()
+
+
+def connect_pool(address=DEFAULT_ADDRESS, authkey=DEFAULT_AUTHKEY, timeout=30.0):
+    """풀 서버에 접속 (서버가 뜰 때까지 timeout초 동안 재시도)"""
+    deadline = time.monotonic() + timeout
+    while True:
+        manager = PoolManager(address=address, authkey=authkey)
+        try:
+            manager.connect()
+            return manager
+        except (ConnectionError, OSError):
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.2)
+
+
+def _attach_shared_memory(name):
+    """다른 프로세스가 만든 공유 메모리에 연결 (연결한 쪽은 resource_tracker에 등록하지 않아 종료 시 지우지 않음)"""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+
+    # 3.12 이하는 연결만 해도 추적 대상으로 등록되므로 잠시 등록을 막음
+    register = resource_tracker.register
+    resource_tracker.register = lambda *args: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+class SharedFrameRing:
+    def __init__(self, slots=8, slot_bytes=DEFAULT_SLOT_BYTES):
+        """프런트엔드가 디코딩한 프레임을 워커에 복사 없이 넘기는 공유 메모리 슬롯 묶음
+
+        슬롯이 모두 사용 중이면 acquire가 대기하므로 처리 중인 프레임 수의 상한 역할도 함
+        """
+        self.slot_bytes = slot_bytes
+        self._segments = [shared_memory.SharedMemory(create=True, size=slot_bytes) for _ in range(slots)]
+        self._free = queue.Queue()
+        for segment in self._segments:
+            self._free.put(segment)
+
+    def acquire(self, image, timeout=None):
+        """이미지를 빈 슬롯에 복사하고 (슬롯, 워커에 보낼 프레임 정보) 반환 - 슬롯보다 크면 배열 그대로 전달
+
+        timeout초 안에 빈 슬롯이 생기지 않으면 TimeoutError
+        """
+        if image.nbytes > self.slot_bytes:
+            return None, ('array', image)
+        try:
+            segment = self._free.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError('no free shared memory slot') from None
+        view = np.ndarray(image.shape, dtype=image.dtype, buffer=segment.buf)
+        view[...] = image
+        return segment, ('shm', segment.name, image.shape, image.dtype.str)
+
+    def release(self, segment):
+        if segment is not None:
+            self._free.put(segment)
+
+    def close(self):
+        for segment in self._segments:
+            segment.close()
+            segment.unlink()
+
+
+def _read_frame(frame, attached):
+    """작업의 프레임 정보를 NumPy 배열로 (공유 메모리는 복사하지 않은 뷰)
+
+    attached: 이름 -> 열어 둔 공유 메모리 (최근 사용 순, MAX_ATTACHED_SEGMENTS개를 넘으면 오래된 것부터 닫음)
+    """
+    if frame[0] == 'array':
+        return frame[1]
+    _, name, shape, dtype = frame
+    segment = attached.pop(name, None)
+    if segment is None:
+        segment = _attach_shared_memory(name)
+    attached[name] = segment
+    while len(attached) > MAX_ATTACHED_SEGMENTS:
+        _close_segment(attached.popitem(last=False)[1])
+    try:
+        return np.ndarray(shape, dtype=np.dtype(dtype), buffer=segment.buf)
+    except (TypeError, ValueError):
+        _close_segment(attached.pop(name))
+        raise
+
+
+def _close_segment(segment):
+    try:
+        segment.close()
+    except BufferError:
+        # 아직 이 메모리를 보는 배열이 남아 있음 - 배열이 사라질 때 매핑도 함께 해제됨
+        pass
+
+
+def worker_main(worker_id, address=DEFAULT_ADDRESS, authkey=DEFAULT_AUTHKEY, model_kwargs=None, max_batch_size=8):
+    """모델 워커 프로세스 - BlindNavigationModel 하나로 대기열의 프레임을 배치 처리"""
+    from model import BlindNavigationModel
+
+    manager = connect_pool(address, authkey)
+    tasks = manager.tasks()
+    status = manager.status()
+    status.update({worker_id: 'loading'})
+
+    model = BlindNavigationModel(warmup=True, **(model_kwargs or {}))
+    stages = []
+    model.add_stage_listener(lambda stage, seconds: stages.append((stage, seconds)))
+    # 클라이언트가 결과 캐시 키에 쓰도록 이 워커가 실제로 로드한 모델 버전을 알림
+    manager.versions().update({worker_id: model.version})
+    status.update({worker_id: 'ready'})
+
+    attached = OrderedDict()
+    result_queues = OrderedDict()
+
+    def reply_queue(reply_to):
+        results = result_queues.pop(reply_to, None)
+        if results is None:
+            results = manager.results(reply_to)
+        result_queues[reply_to] = results
+        while len(result_queues) > MAX_REPLY_QUEUES:
+            result_queues.popitem(last=False)
+        return results
+
+    running = True
+    while running:
+        # 첫 작업을 기다린 뒤 이미 쌓여 있는 작업을 max_batch_size개까지 함께 처리
+        batch = [tasks.get()]
+        while len(batch) < max_batch_size and batch[-1] is not None:
+            try:
+                batch.append(tasks.get_nowait())
+            except queue.Empty:
+                break
+        if batch[-1] is None:
+            batch.pop()
+            running = False
+
+        # 어느 워커가 어떤 작업을 맡았는지 알림 (워커가 죽으면 클라이언트가 해당 작업을 바로 실패 처리)
+        claims = {}
+        for task in batch:
+            claims.setdefault(task[1], []).append(task[0])
+        for reply_to, task_ids in claims.items():
+            reply_queue(reply_to).put(('claim', worker_id, task_ids))
+
+        # 실행할 모델 조합이 같은 작업끼리 묶어 추론
+        groups = {}
+        for task in batch:
+            models = task[3]
+            groups.setdefault(None if models is None else tuple(sorted(models)), []).append(task)
+
+        for models, tasks_in_group in groups.items():
+            # 프레임을 읽지 못한 작업(프런트엔드가 종료하며 공유 메모리를 지운 경우 등)만 실패 처리
+            group, images = [], []
+            for task in tasks_in_group:
+                try:
+                    images.append(_read_frame(task[2], attached))
+                    group.append(task)
+                except Exception as e:
+                    reply_queue(task[1]).put(('result', task[0], None, f'cannot read frame: {e}', []))
+            if not group:
+                continue
+
+            del stages[:]
+            carried = [task[4] for task in group]
+            try:
+                outputs = model.detect_batch(images, models, carried if any(carried) else None)
+                error = None
+            except Exception as e:
+                print(f"워커 {worker_id} 추론 오류: {e}")
+                outputs, error = [None] * len(group), str(e)
+            # 공유 메모리 뷰를 놓아야 오래된 매핑을 닫을 수 있음
+            del images
+
+            for index, (task, output) in enumerate(zip(group, outputs)):
+                # 단계별 시간은 묶음의 첫 결과에만 실어 보냄
+                reply_queue(task[1]).put(('result', task[0], output, error, list(stages) if index == 0 else []))
+
+    status.update({worker_id: 'stopped'})
+    for segment in attached.values():
+        _close_segment(segment)
+
+
+def start_pool(num_workers, address=DEFAULT_ADDRESS, authkey=DEFAULT_AUTHKEY, model_kwargs=None,
+               max_batch_size=8):
+    """대기열 서버와 모델 워커 프로세스들을 띄우고 프로세스 목록 반환"""
+    context = multiprocessing.get_context('spawn')
+    processes = [context.Process(target=serve_pool, args=(address, authkey), name='model-pool-server', daemon=True)]
+    processes[0].start()
+
+    for worker_index in range(num_workers):
+        worker = context.Process(
+            target=worker_main,
+            args=(f'worker-{worker_index}', address, authkey, model_kwargs, max_batch_size),
+            name=f'model-worker-{worker_index}', daemon=True)
+        worker.start()
+        processes.append(worker)
+    return processes
+
+
+def worker_processes(processes):
+    """start_pool이 반환한 프로세스 목록 -> {워커 ID: 프로세스}"""
+    return {f'worker-{index}': process for index, process in enumerate(processes[1:])}
+
+
+def mark_dead_workers(workers, status):
+    """비정상 종료된 워커 프로세스의 상태를 'dead'로 기록 (정상 종료는 워커가 직접 'stopped'로 기록)"""
+    current = status.copy()
+    for worker_id, process in workers.items():
+        if not process.is_alive() and current.get(worker_id) not in ('stopped', 'dead'):
+            print(f"⚠️ 모델 워커 {worker_id} 비정상 종료 (exit code {process.exitcode})")
+            status.update({worker_id: 'dead'})
+
+
+class ModelPoolClient:
+    def __init__(self, address=DEFAULT_ADDRESS, authkey=DEFAULT_AUTHKEY, slots=8, slot_bytes=DEFAULT_SLOT_BYTES,
+                 task_timeout=DEFAULT_TASK_TIMEOUT, workers=None):
+        """모델 워커 풀을 InferenceEngine과 같은 방식(submit/detect)으로 쓰는 프런트엔드 쪽 클라이언트
+
+        같은 호스트의 풀(루프백 주소)이면 공유 메모리로, 다른 호스트면 배열을 대기열로 직접 전달
+        task_timeout초 안에 결과가 오지 않거나 작업을 맡은 워커가 'ready' 상태를 벗어나면
+        해당 작업을 실패 처리하고 공유 메모리 슬롯을 회수
+        workers: 이 클라이언트가 직접 띄운 워커 프로세스 ({워커 ID: 프로세스}) - 비정상 종료를 감시
+        """
+        self.task_timeout = task_timeout
+        self._workers = workers or {}
+        self.model_names = list(DEFAULT_MODEL_PATHS)
+        self._manager = connect_pool(address, authkey)
+        self._tasks = self._manager.tasks()
+        self._status = self._manager.status()
+        self._versions = self._manager.versions()
+        self._name = f'{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}'
+        self._results = self._manager.results(self._name)
+        self._clients = self._manager.clients()
+
+        local = address[0] in ('127.0.0.1', 'localhost', '::1')
+        self._ring = SharedFrameRing(slots, slot_bytes) if local else None
+        if self._ring is not None:
+            atexit.register(self._ring.close)
+        self._ids = itertools.count()
+        self._futures = {}  # 작업 ID -> [Future, 공유 메모리 슬롯, 마감 시각, 맡은 워커 ID]
+        self._lock = threading.Lock()
+        self._stage_listeners = []
+
+        self._receiver = threading.Thread(target=self._receive_loop, name='model-pool-results', daemon=True)
+        self._receiver.start()
+
+    def submit(self, image, models=None, carried=None):
+        """프레임을 공유 메모리 슬롯에 쓰고 워커 풀에 작업 등록 후 Future 반환"""
+        future = Future()
+        if self._ring is not None:
+            try:
+                segment, frame = self._ring.acquire(image, timeout=self.task_timeout)
+            except TimeoutError as e:
+                future.set_exception(e)
+                return future
+        else:
+            segment, frame = None, ('array', image)
+        task_id = next(self._ids)
+        with self._lock:
+            self._futures[task_id] = [future, segment, time.monotonic() + self.task_timeout, None]
+        self._tasks.put((task_id, self._name, frame, list(models) if models is not None else None, carried))
+        return future
+
+    def detect(self, image, models=None, carried=None):
+        """BlindNavigationModel.detect와 같은 형태로 결과를 기다려 반환"""
+        return self.submit(image, models, carried).result()
+
+    def pending(self):
+        """결과를 기다리는 프레임 수"""
+        with self._lock:
+            return len(self._futures)
+
+    def is_ready(self):
+        """준비된 워커가 하나라도 있는지"""
+        return any(value == 'ready' for value in self._status.copy().values())
+
+    def status(self):
+        """워커별 상태"""
+        return self._status.copy()
+
+    def model_version(self):
+        """준비된 워커들이 알린 모델 버전 (워커마다 버전이 다르거나 아직 모르면 None - 결과를 캐시하지 않음)"""
+        ready = [worker_id for worker_id, state in self._status.copy().items() if state == 'ready']
+        versions = self._versions.copy()
+        found = {versions.get(worker_id) for worker_id in ready}
+        if len(found) != 1:
+            return None
+        return found.pop()
+
+    def add_stage_listener(self, callback):
+        """워커가 보낸 단계별 처리 시간을 받을 callback(stage, seconds) 등록"""
+        self._stage_listeners = self._stage_listeners + [callback]
+
+    def stop(self):
+        """결과 수신 종료 및 공유 메모리 해제"""
+        self._results.put(None)
+        self._receiver.join()
+        try:
+            self._clients.drop(self._name)
+        except (EOFError, OSError):
+            pass
+        if self._ring is not None:
+            atexit.unregister(self._ring.close)
+            self._ring.close()
+
+    def _receive_loop(self):
+        """워커 결과를 받아 Future에 전달하고 슬롯 반납 (결과가 없는 동안에는 마감/워커 상태 확인)"""
+        next_check = time.monotonic() + 0.5
+        next_heartbeat = time.monotonic()
+        while True:
+            if time.monotonic() >= next_check:
+                self._expire_tasks()
+                next_check = time.monotonic() + 0.5
+            if time.monotonic() >= next_heartbeat:
+                # 풀 서버가 이 클라이언트의 결과 대기열을 지우지 않도록 살아 있음을 알림
+                try:
+                    self._clients.heartbeat(self._name)
+                except (EOFError, OSError):
+                    pass
+                next_heartbeat = time.monotonic() + HEARTBEAT_INTERVAL
+            try:
+                item = self._results.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError) as e:
+                # 풀 서버 종료 - 기다리는 요청은 모두 실패 처리
+                print(f"모델 풀 연결 끊김: {e}")
+                with self._lock:
+                    entries, self._futures = self._futures, {}
+                for future, _, _, _ in entries.values():
+                    future.set_exception(ConnectionError('model pool disconnected'))
+                break
+            if item is None:
+                break
+
+            if item[0] == 'claim':
+                _, worker_id, task_ids = item
+                with self._lock:
+                    for task_id in task_ids:
+                        entry = self._futures.get(task_id)
+                        if entry is not None:
+                            entry[3] = worker_id
+                continue
+
+            _, task_id, output, error, stages = item
+            for stage, seconds in stages:
+                for listener in self._stage_listeners:
+                    listener(stage, seconds)
+
+            with self._lock:
+                entry = self._futures.pop(task_id, None)
+            if entry is None:
+                # 이미 마감 시간이 지나 실패 처리한 작업
+                continue
+            future, segment, _, _ = entry
+            self._ring_release(segment)
+            if error is not None:
+                future.set_exception(RuntimeError(error))
+            else:
+                future.set_result(output)
+
+    def _expire_tasks(self):
+        """마감 시간이 지났거나 맡은 워커가 'ready' 상태를 벗어난 작업을 실패 처리하고 슬롯 회수"""
+        if self._workers:
+            mark_dead_workers(self._workers, self._status)
+        try:
+            status = self._status.copy()
+        except (EOFError, OSError):
+            return
+
+        now = time.monotonic()
+        expired = []
+        with self._lock:
+            for task_id, (future, segment, deadline, worker_id) in list(self._futures.items()):
+                worker_state = status.get(worker_id) if worker_id is not None else None
+                if deadline < now:
+                    error = TimeoutError(f'model pool task timed out after {self.task_timeout:g}s')
+                elif worker_state not in (None, 'ready', 'stopped'):
+                    error = RuntimeError(f'model worker {worker_id} is {worker_state}')
+                else:
+                    continue
+                del self._futures[task_id]
+                expired.append((future, segment, error))
+
+        for future, segment, error in expired:
+            # 멈춘 워커가 나중에 결과를 보내도 이미 지운 작업이므로 슬롯을 두 번 반납하지 않음
+            self._ring_release(segment)
+            future.set_exception(error)
+
+    def _ring_release(self, segment):
+        if segment is not None:
+            self._ring.release(segment)
+
+
+def connect_model_pool(spec, authkey=DEFAULT_AUTHKEY):
+    """MODEL_POOL 설정으로 풀 클라이언트 생성 - 'local:N'이면 워커 N개를 직접 띄우고, 'host:port'면 기존 풀에 접속"""
+    if spec.startswith('local'):
+        num_workers = int(spec.partition(':')[2] or os.cpu_count() or 1)
+        processes = start_pool(num_workers, DEFAULT_ADDRESS, authkey)
+        return ModelPoolClient(DEFAULT_ADDRESS, authkey, workers=worker_processes(processes))
+    return ModelPoolClient(parse_address(spec), authkey)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='여러 프런트엔드가 함께 쓰는 모델 워커 풀 실행')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='모델 워커 프로세스 수')
+    parser.add_argument('--address', default=f'{DEFAULT_ADDRESS[0]}:{DEFAULT_ADDRESS[1]}', help='대기열 서버 주소')
+    parser.add_argument('--batch-size', type=int, default=8, help='워커가 한 번에 처리할 최대 프레임 수')
+    args = parser.parse_args()
+
+    processes = start_pool(args.workers, parse_address(args.address), DEFAULT_AUTHKEY,
+                           max_batch_size=args.batch_size)
+    print(f"모델 워커 {args.workers}개 실행 중 (종료: Ctrl+C)")
+
+    # 비정상 종료한 워커를 상태에 기록해 클라이언트가 맡긴 작업을 바로 실패 처리하도록 함
+    workers = worker_processes(processes)
+    status = connect_pool(parse_address(args.address), DEFAULT_AUTHKEY).status()
+    try:
+        while processes[0].is_alive() and any(process.is_alive() for process in workers.values()):
+            mark_dead_workers(workers, status)
+            time.sleep(1.0)
+        mark_dead_workers(workers, status)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())